@@ -1,22 +1,34 @@
+import functools
+
 import numpy as np
+import pandas as pd
 from lmfit import Parameters, minimize
 
+from ..utils import apply_many, linear_recurrence
+
 
 def _heartrate_model_predict(model_params, power):
-    power = power + power.cumsum() * model_params["hr_drift"]
-    hr_lin = power * model_params["dhr"] + model_params["hr_rest"]
-    hr_ss = np.minimum(model_params["hr_max"], hr_lin)
+    """Predicts the heart rate for power
 
-    dhr = np.insert(np.diff(power), 0, 0)
-    tau = np.where((dhr <= 0), model_params["tau_fall"], model_params["tau_rise"])
+    The heart rate follows a first order filter towards the steady state heart rate:
+    hr[t] = hr[t - 1] + (hr_ss[t] - hr[t - 1]) / tau[t], which is solved as a linear
+    recurrence instead of a loop over the samples.
+    """
+    power = np.asarray(power, dtype=float)
+    power = power + np.cumsum(power) * float(model_params["hr_drift"])
+    hr_lin = power * float(model_params["dhr"]) + float(model_params["hr_rest"])
+    hr_ss = np.minimum(float(model_params["hr_max"]), hr_lin)
 
-    predicted_hr = []
-    hr_previous = model_params["hr_rest"]
-    for h, t in zip(hr_ss, tau):
-        hr_previous = hr_previous + (h - hr_previous) / t
-        predicted_hr.append(hr_previous)
+    # tau_fall where power does not increase, including the first sample
+    falling = np.ones(len(power), dtype=bool)
+    np.less_equal(power[1:], power[:-1], out=falling[1:])
+    inverse_tau_rise = 1 / float(model_params["tau_rise"])
+    inverse_tau_fall = 1 / float(model_params["tau_fall"])
+    inverse_tau = inverse_tau_rise + falling * (inverse_tau_fall - inverse_tau_rise)
 
-    return predicted_hr
+    return linear_recurrence(
+        1 - inverse_tau, hr_ss * inverse_tau, initial=float(model_params["hr_rest"])
+    )
 
 
 def _heartrate_model_residuals(model_params, power, heartrate):
@@ -24,13 +36,17 @@ def _heartrate_model_residuals(model_params, power, heartrate):
     return heartrate - model
 
 
-def heartrate_model(heartrate, power, **kwargs):
-    """
-    Source:
-    De Smet et al., Heart rate modelling as a potential physical finess assessment for runners and cyclists.
-    http://ceur-ws.org/Vol-1842/paper_13.pdf
-    """
-    # Initial model parameters
+HEARTRATE_MODEL_PARAMS = [
+    "hr_rest",
+    "hr_max",
+    "dhr",
+    "tau_rise",
+    "tau_fall",
+    "hr_drift",
+]
+
+
+def _initial_model_params(**kwargs):
     model_params = Parameters()
     model_params.add_many(
         ("hr_rest", kwargs.get("hr_rest", 75)),
@@ -41,13 +57,257 @@ def heartrate_model(heartrate, power, **kwargs):
         ("hr_drift", kwargs.get("hr_drift", 3 * 10 ** -5)),
     )
 
+    return model_params
+
+
+def heartrate_model(heartrate, power, **kwargs):
+    """
+    Source:
+    De Smet et al., Heart rate modelling as a potential physical finess assessment for runners and cyclists.
+    http://ceur-ws.org/Vol-1842/paper_13.pdf
+    """
+    # Initial model parameters
+    model_params = _initial_model_params(**kwargs)
+
     model = minimize(
         fcn=_heartrate_model_residuals,
         params=model_params,
         method="nelder",  # Nelder-Mead
-        args=(power, heartrate),
+        args=(np.asarray(power, dtype=float), np.asarray(heartrate, dtype=float)),
     )
 
     predictions = _heartrate_model_predict(model.params, power)
 
     return model, predictions
+
+
+class HeartRatePredictor:
+    """Real-time heart rate model
+
+    Predicts the heart rate sample by sample in constant time and memory, with the model of
+    heartrate_model(). Replaying an activity gives the predictions of the batch model (up to
+    floating point rounding). When
+    the measured heart rate is pushed as well the residuals (measured - predicted heart
+    rate) are tracked, an increasing residual indicates cardiac drift.
+
+    Parameters
+    ----------
+    model_params : dict or lmfit.Parameters
+        Model parameters, for example model.params of heartrate_model()
+    span : number, optional
+        Span in samples of the exponentially weighted mean of the residuals (the default is
+        300)
+    """
+
+    __slots__ = (
+        "hr_rest",
+        "hr_max",
+        "dhr",
+        "tau_rise",
+        "tau_fall",
+        "hr_drift",
+        "alpha",
+        "heartrate",
+        "residual",
+        "mean_residual",
+        "ewm_residual",
+        "n_samples",
+        "n_residuals",
+        "_cumulative_power",
+        "_previous_power",
+    )
+
+    def __init__(self, model_params, span=300):
+        for name in HEARTRATE_MODEL_PARAMS:
+            setattr(self, name, float(model_params[name]))
+        self.alpha = 2 / (span + 1)
+
+        self.heartrate = self.hr_rest
+        self.residual = np.nan
+        self.mean_residual = np.nan
+        self.ewm_residual = np.nan
+        self.n_samples = 0
+        self.n_residuals = 0
+
+        self._cumulative_power = 0.0
+        self._previous_power = None
+
+    def push(self, power, heartrate=None):
+        """Add a sample
+
+        Parameters
+        ----------
+        power : number
+            Power of the sample
+        heartrate : number, optional
+            Measured heart rate of the sample, used for the residuals
+
+        Returns
+        -------
+        float
+            Predicted heart rate
+        """
+        if not np.isnan(power):
+            self._cumulative_power += power
+        power = power + self._cumulative_power * self.hr_drift
+
+        hr_lin = power * self.dhr + self.hr_rest
+        hr_ss = self.hr_max if hr_lin > self.hr_max else hr_lin
+
+        # Like the batch model, a missing value counts as rising power
+        falling = self._previous_power is None or power - self._previous_power <= 0
+        tau = self.tau_fall if falling else self.tau_rise
+        self._previous_power = power
+
+        self.heartrate = self.heartrate + (hr_ss - self.heartrate) / tau
+        self.n_samples += 1
+
+        if heartrate is not None and not np.isnan(heartrate):
+            self._update_residuals(heartrate - self.heartrate)
+
+        return self.heartrate
+
+    def _update_residuals(self, residual):
+        self.residual = residual
+        self.n_residuals += 1
+
+        if self.n_residuals == 1:
+            self.mean_residual = residual
+            self.ewm_residual = residual
+        else:
+            self.mean_residual += (residual - self.mean_residual) / self.n_residuals
+            self.ewm_residual += self.alpha * (residual - self.ewm_residual)
+
+
+def _fit_activity(item, kwargs):
+    heartrate, power = item
+    model, _ = heartrate_model(heartrate, power, **kwargs)
+
+    record = {name: model.params[name].value for name in HEARTRATE_MODEL_PARAMS}
+    record["nfev"] = model.nfev
+
+    return record
+
+
+def heartrate_model_many(activities, n_jobs=None, chunk_size=10, **kwargs):
+    """Fits the heart rate model to many activities
+
+    Every activity is fitted separately with heartrate_model(), in a process pool with
+    sweat.utils.apply_many(). Activities that could not be fitted have an "error".
+
+    Parameters
+    ----------
+    activities : dict or list
+        (heartrate, power) pairs by activity (a list is keyed by position)
+    n_jobs : int, optional
+        Number of processes, see sweat.utils.apply_many() (the default is None)
+    chunk_size : int, optional
+        Number of activities per task (the default is 10)
+    **kwargs
+        Initial model parameters, see heartrate_model()
+
+    Returns
+    -------
+    pd.DataFrame
+        Data frame indexed by activity with the fitted parameters and the "nfev" and "error"
+        columns
+    """
+    return apply_many(
+        functools.partial(_fit_activity, kwargs=kwargs),
+        activities,
+        index="activity",
+        columns=HEARTRATE_MODEL_PARAMS + ["nfev"],
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+    )
+
+
+def _activity_params(model_params, shared, i):
+    return {
+        name: model_params[name if name in shared else f"{name}_{i}"]
+        for name in HEARTRATE_MODEL_PARAMS
+    }
+
+
+def _joint_heartrate_model_residuals(model_params, activities, shared):
+    return np.concatenate(
+        [
+            heartrate
+            - _heartrate_model_predict(_activity_params(model_params, shared, i), power)
+            for i, (heartrate, power) in enumerate(activities)
+        ]
+    )
+
+
+def heartrate_model_joint(
+    activities,
+    shared=("hr_rest", "hr_max", "tau_rise", "tau_fall"),
+    method="leastsq",
+    **kwargs,
+):
+    """Fits the heart rate model to multiple activities at once
+
+    The shared parameters are fitted to all activities together, the other parameters (by
+    default dhr and hr_drift) are fitted per activity.
+
+    Parameters
+    ----------
+    activities : dict or list
+        (heartrate, power) pairs by activity (a list is keyed by position)
+    shared : list of str, optional
+        Parameters that are shared by all activities (the default is
+        ("hr_rest", "hr_max", "tau_rise", "tau_fall"))
+    method : str, optional
+        lmfit minimization method (the default is "leastsq", because the number of parameters
+        grows with the number of activities, which Nelder-Mead does not handle well)
+    **kwargs
+        Initial model parameters, see heartrate_model()
+
+    Returns
+    -------
+    tuple of (lmfit.MinimizerResult, pd.DataFrame, list of numpy.ndarray)
+        The result of the minimization, a data frame indexed by activity with the parameters
+        of every activity and the predictions of every activity
+    """
+    if not isinstance(activities, dict):
+        activities = dict(enumerate(activities))
+
+    keys = list(activities.keys())
+    arrays = [
+        (np.asarray(heartrate, dtype=float), np.asarray(power, dtype=float))
+        for heartrate, power in activities.values()
+    ]
+
+    initial_params = _initial_model_params(**kwargs)
+    model_params = Parameters()
+    for name in HEARTRATE_MODEL_PARAMS:
+        if name in shared:
+            model_params.add(name, value=initial_params[name].value)
+        else:
+            for i in range(len(keys)):
+                model_params.add(f"{name}_{i}", value=initial_params[name].value)
+
+    model = minimize(
+        fcn=_joint_heartrate_model_residuals,
+        params=model_params,
+        method=method,
+        args=(arrays, shared),
+    )
+
+    parameters = pd.DataFrame(
+        [
+            {
+                name: value.value
+                for name, value in _activity_params(model.params, shared, i).items()
+            }
+            for i in range(len(keys))
+        ],
+        index=pd.Index(keys, name="activity"),
+        columns=HEARTRATE_MODEL_PARAMS,
+    )
+    predictions = [
+        _heartrate_model_predict(_activity_params(model.params, shared, i), power)
+        for i, (_, power) in enumerate(arrays)
+    ]
+
+    return model, parameters, predictions
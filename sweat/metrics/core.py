@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 from collections import namedtuple
+from scipy import ndimage
+from scipy.signal import lfilter
 
 
 def mask_fill(y, mask=None, value=0.0):
@@ -44,7 +46,7 @@ def rolling_mean(y, window=10, mask=None, algorithm="uniform", value=0.0):
         Size of the moving window in sec, default=10
     mask : array-like of boolean, optional
         Default value is None, which means no masking will be applied
-    algorithm : {"uniform", "emwa"}, optional
+    algorithm : {"uniform", "ewma"}, optional
         Type of averaging, default="uniform"
     value : number, optional
         Value to use for replacement, default=0.0
@@ -69,7 +71,48 @@ def rolling_mean(y, window=10, mask=None, algorithm="uniform", value=0.0):
     return y
 
 
-def median_filter(y, window=31, threshold=1, value=None):
+def _rolling_median(y, window, out=None):
+    """Rolling median with the same output as pandas' rolling(window, min_periods=1).median()
+
+    Uses the rank filter of scipy.ndimage with the window shifted to end at the sample. The
+    first window - 1 samples have shorter windows and are computed separately. Streams with
+    missing values fall back to pandas, which skips missing values.
+
+    Parameters
+    ----------
+    y : ndarray
+    window : int
+    out : ndarray, optional
+        Array to write the result to
+
+    Returns
+    -------
+    ndarray
+    """
+    if out is None:
+        out = np.empty(len(y))
+
+    if np.isnan(y).any():
+        out[:] = pd.Series(y).rolling(window, min_periods=1).median().values
+        return out
+
+    # A positive origin shifts the window to the left, this makes it end at the sample
+    origin = (window - 1) // 2
+    if window % 2:
+        ndimage.median_filter(y, size=window, origin=origin, output=out)
+    else:
+        # The median of an even number of values is the mean of the two middle values
+        ndimage.rank_filter(y, window // 2 - 1, size=window, origin=origin, output=out)
+        out += ndimage.rank_filter(y, window // 2, size=window, origin=origin)
+        out /= 2
+
+    for i in range(min(window - 1, len(y))):
+        out[i] = np.median(y[: i + 1])
+
+    return out
+
+
+def median_filter(y, window=31, threshold=1, value=None, out=None):
     """Outlier replacement using median filter
 
     Detect outliers using median filter and replace with rolling median or specified value
@@ -83,33 +126,39 @@ def median_filter(y, window=31, threshold=1, value=None):
         default=3 and corresponds to 2xSigma
     value : float, optional
         Value to be used for replacement, default=None, which means replacement by rolling median value
+    out : ndarray, optional
+        Array to write the result to, default=None, which means a new array is allocated.
+        Passing y itself filters the stream in-place.
 
     Returns
     -------
     y: ndarray
-
-    All operations will be performed on the original array.
-    To preserve original array pass a copy to the function
     """
-    y = pd.Series(y)
+    y = np.asarray(y, dtype=float)
+    if out is None:
+        out = np.empty(len(y))
 
-    rolling_median = y.rolling(window, min_periods=1).median()
+    rolling_median = _rolling_median(y, window)
 
-    difference = np.abs(y - rolling_median)
+    difference = np.subtract(y, rolling_median)
+    np.abs(difference, out=difference)
 
-    median_abs_deviation = difference.rolling(window, min_periods=1).median()
+    median_abs_deviation = _rolling_median(difference, window)
 
     outlier_idx = difference > 1.4826 * threshold * median_abs_deviation
     """ The factor 1.4826 makes the MAD scale estimate
         an unbiased estimate of the standard deviation for Gaussian data.
     """
 
+    if out is not y:
+        out[:] = y
+
     if value:
-        y[outlier_idx] = value
+        out[outlier_idx] = value
     else:
-        y[outlier_idx] = rolling_median[outlier_idx]
+        np.copyto(out, rolling_median, where=outlier_idx)
 
-    return y.values
+    return out
 
 
 # FTP based 7-zones with left bind edge set to -0.001
@@ -137,6 +186,69 @@ HEART_RATE_ZONES_DESC = [
 HEART_RATE_ZONES_ZNAME = ["Z1", "Z2", "Z3", "Z4", "Z5"]
 
 
+def _zone_edges(zones=None, ftp=None, lthr=None):
+    if zones is not None:
+        abs_zones = zones
+    elif ftp is not None:
+        abs_zones = np.asarray(POWER_ZONES_THRESHOLD) * ftp
+    elif lthr is not None:
+        abs_zones = np.asarray(HEART_RATE_ZONES) * lthr
+    else:
+        raise ValueError(
+            "One of the keyword arguments [zones, ftp, lthr] must be provided"
+        )
+
+    return abs_zones
+
+
+def zone_counts(y, edges):
+    """Number of samples in each zone for one or more zone systems
+
+    Zones are right-closed intervals between consecutive edges, like pandas.cut() uses. Values
+    outside of the zones and missing values are not counted.
+
+    Parameters
+    ----------
+    y : ndarray
+    edges : array-like
+        Increasing zone edges, either 1-dimensional for one zone system or 2-dimensional with
+        one row of edges per zone system (e.g. per athlete or threshold)
+
+    Returns
+    -------
+    ndarray of int
+        Count for every zone, with shape (n_zones,) or (n_systems, n_zones). Empty zones are
+        included.
+    """
+    y = np.asarray(y, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    single = edges.ndim == 1
+    edges = np.atleast_2d(edges)
+
+    if edges.ndim != 2 or edges.shape[1] < 2:
+        raise ValueError("Zone edges should be a 1- or 2-dimensional array of edges")
+
+    if np.any(np.diff(edges, axis=1) <= 0):
+        raise ValueError("Zone edges should be increasing")
+
+    n_systems, n_edges = edges.shape
+
+    # Bin i contains the values in (edges[i - 1], edges[i]], so bin 0 and bin n_edges (which
+    # also contains missing values) are outside of the zones. Offsetting the bins of every
+    # zone system makes it possible to count all zone systems with one bincount.
+    bins = np.empty((n_systems, len(y)), dtype=np.int64)
+    for i, row in enumerate(edges):
+        np.add(np.searchsorted(row, y, side="left"), i * (n_edges + 1), out=bins[i])
+
+    counts = np.bincount(bins.ravel(), minlength=n_systems * (n_edges + 1))
+    counts = counts.reshape(n_systems, n_edges + 1)[:, 1:n_edges]
+
+    if single:
+        return counts[0]
+
+    return counts
+
+
 def compute_zones(y, zones=None, ftp=None, lthr=None, labels=None):
     """Convert stream into respective zones stream
 
@@ -159,16 +271,7 @@ def compute_zones(y, zones=None, ftp=None, lthr=None, labels=None):
     array-like of int, the same type as arg
     """
 
-    if zones is not None:
-        abs_zones = zones
-    elif ftp is not None:
-        abs_zones = np.asarray(POWER_ZONES_THRESHOLD) * ftp
-    elif lthr is not None:
-        abs_zones = np.asarray(HEART_RATE_ZONES) * lthr
-    else:
-        raise ValueError(
-            "One of the keyword arguments [zones, ftp, lthr] must be provided"
-        )
+    abs_zones = _zone_edges(zones=zones, ftp=ftp, lthr=lthr)
 
     if labels is None:
         labels = list(range(1, len(abs_zones)))
@@ -206,10 +309,59 @@ def best_interval(y, window, mask=None, value=0.0):
     return rv
 
 
+def best_intervals(y, windows, mask=None, value=0.0):
+    """Compute best intervals of the stream for multiple window sizes
+
+    Same as best_interval() for every window, but all windows share one cumulative sum
+    and masking is applied once.
+
+    Parameters
+    ----------
+    y: ndarray
+    windows : array-like of int
+        Durations of the intervals in seconds
+    mask : array-like of bool, optional
+        default=None, which means no masking
+    value : number, optional
+        Value to use for replacement, default=0.0
+
+    Returns
+    -------
+    ndarray
+        Best interval for every window
+    """
+    y = mask_fill(y, mask=mask, value=value)
+    y = np.asarray(y, dtype=float)
+    windows = _validate_durations(windows)
+
+    # Missing values are skipped, like pandas' rolling mean does
+    missing = np.isnan(y)
+    energy = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, y))])
+    counts = np.concatenate([[0], np.cumsum(~missing)])
+
+    ends = np.arange(1, len(y) + 1)
+    starts = np.empty(len(y), dtype=np.int64)
+    means = np.empty(len(y))
+
+    rv = np.full(len(windows), np.nan)
+    for i, window in enumerate(windows):
+        # The first windows are shorter than window, like rolling_mean() with min_periods=1
+        np.subtract(ends, window, out=starts)
+        np.maximum(starts, 0, out=starts)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.divide(
+                energy[1:] - energy[starts], counts[1:] - counts[starts], out=means
+            )
+        rv[i] = np.fmax.reduce(means, initial=np.nan)
+
+    return rv
+
+
 def time_in_zones(y, **kwargs):
     """Time in zones
 
-    Calculate time [sec] spent in each zone
+    Calculate time [sec] spent in each zone, see zone_counts()
 
     Parameters
     ----------
@@ -219,11 +371,67 @@ def time_in_zones(y, **kwargs):
     Returns
     -------
     ndarray
+        Time for every zone, including empty zones
+    """
+    labels = kwargs.pop("labels", None)
+    abs_zones = _zone_edges(**kwargs)
+    if labels is not None:
+        assert len(abs_zones) == (len(labels) + 1)
+
+    tiz = zone_counts(y, abs_zones)
+
+    return tiz
+
+
+def _uniform_rolling_mean(y, window):
+    """Uniform rolling mean with min_periods=1 from the cumulative sum of the stream"""
+    cumsum = np.cumsum(y)
+    rv = np.empty(len(y))
+
+    head = min(window, len(y))
+    np.divide(cumsum[:head], np.arange(1, head + 1), out=rv[:head])
+    np.subtract(cumsum[window:], cumsum[:-window], out=rv[window:])
+    rv[window:] /= window
+
+    return rv
+
+
+def _xpower_ewma(y):
+    """Exponentially weighted moving average of xPower
+
+    Like GoldenCheetah, the average has a time constant of 25 seconds
+    (weighted[t] = weighted[t - 1] * 25 / 26 + y[t] / 26) and starts at 0. Missing values
+    are skipped, the average holds its value over them.
     """
-    z = pd.Series(compute_zones(y, **kwargs))
-    tiz = z.groupby(z).count()
+    valid = ~np.isnan(y)
+    rv = lfilter([1 / 26], [1.0, -25 / 26], y[valid])
+    if valid.all():
+        return rv
+
+    positions = np.cumsum(valid) - 1
+    return np.where(positions >= 0, rv[np.maximum(positions, 0)], 0.0)
+
+
+def _fourth_power_mean_root(y):
+    """(mean(y ** 4)) ** (1 / 4), computed in-place"""
+    np.square(y, out=y)
+    np.square(y, out=y)
+
+    return np.mean(y) ** (1 / 4)
 
-    return tiz.values
+
+def _weighted_average_power(y, algorithm):
+    y = np.asarray(y, dtype=float)
+
+    if algorithm == "xPower":
+        _rolling_mean = _xpower_ewma(y)
+    elif np.isnan(y).any():
+        # pandas skips missing values in the rolling mean
+        _rolling_mean = rolling_mean(y, window=30)
+    else:
+        _rolling_mean = _uniform_rolling_mean(y, window=30)
+
+    return _fourth_power_mean_root(_rolling_mean)
 
 
 def weighted_average_power(y, mask=None, algorithm="WAP", value=0.0):
@@ -245,24 +453,304 @@ def weighted_average_power(y, mask=None, algorithm="WAP", value=0.0):
     number
     """
 
-    if algorithm == "WAP":
-        _rolling_mean = rolling_mean(y, window=30, mask=mask, value=value)
-    elif algorithm == "xPower":
-        _rolling_mean = rolling_mean(
-            y, window=25, mask=mask, value=value, algorithm="emwa"
-        )
+    if algorithm not in ("WAP", "xPower"):
+        raise ValueError(f"Invalid algorithm: {algorithm}")
+
+    y = mask_fill(y, mask=mask, value=value)
 
-    rv = np.mean(np.power(_rolling_mean, 4)) ** (1 / 4)
+    rv = _weighted_average_power(y, algorithm)
 
     return rv
 
 
-def mean_max(y, mask=None, value=0.0, monotonic=False):
+def wap_and_xpower(y, mask=None, value=0.0):
+    """Weighted average power and xPower
+
+    Computes both metrics of weighted_average_power() at once, applying the mask only once.
+
+    Parameters
+    ----------
+    y : ndarray
+        Power stream
+    mask: array-like of bool, optional
+        default=None, which means no masking
+    value : number, optional
+        Value to use for replacement, default=0.0
+
+    Returns
+    -------
+    (number, number)
+        WAP and xPower
+    """
+
+    y = mask_fill(y, mask=mask, value=value)
+
+    rv = _weighted_average_power(y, "WAP"), _weighted_average_power(y, "xPower")
+
+    return rv
+
+
+# Upper bound on the number of elements of the (samples x durations) work matrix that is
+# used by the mean-max engine. This keeps memory usage bounded (32MB) for long activities.
+MEAN_MAX_BLOCK_SIZE = 2 ** 22
+
+
+def _cumulative_energy(y):
+    """Cumulative energy of a stream
+
+    Missing values are skipped in the accumulation but stay missing in the result, which is
+    equal to the behaviour of pandas.Series.cumsum().
+
+    Parameters
+    ----------
+    y : array-like
+
+    Returns
+    -------
+    ndarray
+    """
+    y = np.asarray(y, dtype=float)
+    missing = np.isnan(y)
+
+    if missing.any():
+        energy = np.cumsum(np.where(missing, 0.0, y))
+        energy[missing] = np.nan
+    else:
+        energy = np.cumsum(y)
+
+    return energy
+
+
+def _best_energy_windows(energy, durations):
+    """Maximum energy difference for each duration
+
+    Computes ``max(energy[j + t] - energy[j])`` over all *j* for every duration *t*, together
+    with the *j* at which the maximum is found. Durations are processed in blocks so that the
+    intermediate matrix never exceeds MEAN_MAX_BLOCK_SIZE elements.
+
+    Parameters
+    ----------
+    energy : ndarray
+        Cumulative energy, see _cumulative_energy()
+    durations : ndarray of int
+        Sorted durations in samples, all durations should be in the range [1, len(energy))
+
+    Returns
+    -------
+    (ndarray, ndarray of int)
+        Maximum energy difference and the corresponding *j* (-1 when there is no maximum)
+    """
+    length = len(energy)
+    rv = np.empty(len(durations))
+    offsets = np.empty(len(durations), dtype=np.int64)
+    if length == 0 or len(durations) == 0:
+        return rv, offsets
+
+    has_missing = np.isnan(energy).any()
+
+    # Padding the end of the energy array with -inf makes sure that windows that run beyond
+    # the end of the stream never contribute to the maximum.
+    ends = np.concatenate([energy, np.full(length, -np.inf)])
+    stride = ends.strides[0]
+    buffer = np.empty(min(max(MEAN_MAX_BLOCK_SIZE, length), len(durations) * length))
+
+    i = 0
+    while i < len(durations):
+        first = durations[i]
+        rows = length - first
+        block = durations[i : i + max(1, MEAN_MAX_BLOCK_SIZE // rows)]
+        span = block[-1] - first + 1
+
+        # windows[k, j] == ends[first + k + j]
+        windows = np.lib.stride_tricks.as_strided(
+            ends[first:], shape=(span, rows), strides=(stride, stride), writeable=False
+        )
+        if span != len(block):
+            windows = windows[block - first]
+
+        work = buffer[: len(block) * rows].reshape(len(block), rows)
+        np.subtract(windows, energy[np.newaxis, :rows], out=work)
+        if has_missing:
+            work[np.isnan(work)] = -np.inf
+
+        # The maximum is looked up at the position of the argmax so the location of the best
+        # window comes without a second pass over the work matrix.
+        block_offsets = work.argmax(axis=1)
+        rv[i : i + len(block)] = work[np.arange(len(block)), block_offsets]
+        offsets[i : i + len(block)] = block_offsets
+        i += len(block)
+
+    missing = rv == -np.inf
+    rv[missing] = np.nan
+    offsets[missing] = -1
+
+    return rv, offsets
+
+
+def _best_energy_windows_ending(energy, durations, first_end):
+    """Maximum energy difference for each duration of windows that end at or after first_end
+
+    Same as _best_energy_windows() but restricted to windows ``energy[e] - energy[e - t]``
+    with ``e >= first_end``. The work matrix is laid out over the window ends, so the work is
+    proportional to the number of samples after first_end instead of the length of the energy.
+
+    Parameters
+    ----------
+    energy : ndarray
+        Cumulative energy, see _cumulative_energy()
+    durations : ndarray of int
+        Sorted durations in samples, all durations should be in the range [1, len(energy))
+    first_end : int
+        Index of the first window end
+
+    Returns
+    -------
+    (ndarray, ndarray of int)
+        Maximum energy difference and the corresponding start *j* = *e* - *t* (-1 when there
+        is no maximum)
+    """
+    length = len(energy)
+    columns = length - first_end
+    rv = np.empty(len(durations))
+    offsets = np.empty(len(durations), dtype=np.int64)
+    if columns <= 0 or len(durations) == 0:
+        rv[:] = np.nan
+        offsets[:] = -1
+        return rv, offsets
+
+    has_missing = np.isnan(energy).any()
+    ends = energy[np.newaxis, first_end:]
+
+    # Padding the start of the energy array with inf makes sure that windows that would start
+    # before the first sample never contribute to the maximum.
+    padding = durations[-1]
+    starts = np.concatenate([np.full(padding, np.inf), energy])
+    stride = starts.strides[0]
+    buffer = np.empty(min(max(MEAN_MAX_BLOCK_SIZE, columns), len(durations) * columns))
+
+    i = 0
+    while i < len(durations):
+        block = durations[i : i + max(1, MEAN_MAX_BLOCK_SIZE // columns)]
+        last = block[-1]
+        span = last - block[0] + 1
+
+        # windows[k, m] == energy[first_end + m - (last - k)]
+        windows = np.lib.stride_tricks.as_strided(
+            starts[padding + first_end - last :],
+            shape=(span, columns),
+            strides=(stride, stride),
+            writeable=False,
+        )
+        if span == len(block):
+            windows = windows[::-1]
+        else:
+            windows = windows[last - block]
+
+        work = buffer[: len(block) * columns].reshape(len(block), columns)
+        np.subtract(ends, windows, out=work)
+        if has_missing:
+            work[np.isnan(work)] = -np.inf
+
+        block_ends = work.argmax(axis=1)
+        rv[i : i + len(block)] = work[np.arange(len(block)), block_ends]
+        offsets[i : i + len(block)] = first_end + block_ends - block
+        i += len(block)
+
+    missing = rv == -np.inf
+    rv[missing] = np.nan
+    offsets[missing] = -1
+
+    return rv, offsets
+
+
+def _monotonic(y):
+    """Make a mean-max curve monotonically decreasing
+
+    Every value is replaced by the maximum of the values at the same or longer durations.
+    Missing values are kept and restart the running maximum.
+
+    Parameters
+    ----------
+    y : ndarray
+
+    Returns
+    -------
+    (ndarray, ndarray of int)
+        Monotonic curve and for every value the position in *y* it originates from
+    """
+    rv = np.flip(y).copy()
+    source = np.arange(len(rv))
+
+    starts = np.concatenate([[0], np.flatnonzero(np.isnan(rv)) + 1])
+    stops = np.append(starts[1:] - 1, len(rv))
+    for start, stop in zip(starts, stops):
+        segment = rv[start:stop]
+        if len(segment) == 0:
+            continue
+
+        is_new_maximum = np.empty(len(segment), dtype=bool)
+        is_new_maximum[0] = True
+        np.greater(
+            segment[1:], np.maximum.accumulate(segment)[:-1], out=is_new_maximum[1:]
+        )
+        np.maximum.accumulate(segment, out=segment)
+        source[start:stop] = np.maximum.accumulate(
+            np.where(is_new_maximum, source[start:stop], 0)
+        )
+
+    return np.flip(rv), len(rv) - 1 - np.flip(source)
+
+
+def log_spaced_durations(stop=36000, number=100, start=1):
+    """Log-spaced durations
+
+    Generate (approximately) logarithmically spaced durations that can be passed as *durations*
+    to mean_max(). Durations are rounded to whole seconds, so duplicates at the short end are
+    removed and less than *number* durations might be returned.
+
+    Parameters
+    ----------
+    stop : int, optional
+        Longest duration in seconds, default=36000 (10 hours)
+    number : int, optional
+        Number of durations, default=100
+    start : int, optional
+        Shortest duration in seconds, default=1
+
+    Returns
+    -------
+    ndarray of int
+    """
+    durations = np.round(np.geomspace(start, stop, number)).astype(np.int64)
+
+    return np.unique(durations)
+
+
+def _validate_durations(durations):
+    durations = np.asarray(durations)
+
+    if durations.ndim != 1:
+        raise ValueError("Durations should be a 1-dimensional array-like")
+
+    if len(durations) and (np.any(durations % 1 != 0) or np.any(durations < 1)):
+        raise ValueError("Durations should be positive integers")
+
+    return durations.astype(np.int64)
+
+
+def mean_max(
+    y, mask=None, value=0.0, monotonic=False, durations=None, return_index=False
+):
     """Mean-max curve
 
     Compute mean-max (power duration curve) from the stream. Mask-filter options can be
     added using the keyword arguments.
 
+    By default the curve is computed for every duration from 1 second up to the length of
+    the stream. When only a part of the curve is needed (for example log-spaced durations,
+    see log_spaced_durations()) the *durations* keyword argument can be used, which is a lot
+    faster for long streams.
+
     Parameters
     ----------
     arg : array-like
@@ -271,35 +759,57 @@ def mean_max(y, mask=None, value=0.0, monotonic=False):
         Replacement mask (the default is None, which implies no masking)
     value: number, optional
         Value to use as a replacement (the default is 0.0)
+    monotonic: bool, optional
+        Make the curve monotonically decreasing (the default is False)
+    durations: array-like of int, optional
+        Durations in seconds to compute the curve for (the default is None, which implies
+        all durations). Durations that are not shorter than the stream result in nan.
+    return_index: bool, optional
+        Also return the start index of the best effort for every duration (the default is
+        False). Is -1 when there is no effort. For a monotonic curve this is the start index
+        of the (longer) effort the value originates from.
 
     Returns
     -------
-    ndarray
+    ndarray or (ndarray, ndarray of int)
     """
 
     y = mask_fill(y, mask=mask, value=value)
-    y = pd.Series(y)
 
     # Compute the accumulated energy from the power data
-    energy = y.cumsum()
+    energy = _cumulative_energy(y)
+
+    if durations is None:
+        durations = np.arange(1, len(energy))
+        order = np.arange(len(durations))
+    else:
+        durations = _validate_durations(durations)
+        order = np.argsort(durations, kind="stable")
 
     # Compute the maximum sustainable power using the difference in energy
     # This method is x4 faster than using rolling mean
-    y = np.array([])
-    for t in np.arange(1, len(energy)):
-        y = np.append(y, energy.diff(t).max() / (t))
+    sorted_durations = durations[order]
+    sorted_durations = sorted_durations[sorted_durations < len(energy)]
+    energy_diff, offsets = _best_energy_windows(energy, sorted_durations)
+
+    sorted_y = np.full(len(durations), np.nan)
+    sorted_y[: len(sorted_durations)] = energy_diff / sorted_durations
+
+    # energy[j + t] - energy[j] is the energy of the window that starts at j + 1
+    sorted_index = np.full(len(durations), -1, dtype=np.int64)
+    sorted_index[: len(sorted_durations)] = np.where(offsets < 0, -1, offsets + 1)
 
     if monotonic:
-        monotonic_y = []
-        previous = y[-1]
-        for p in np.flip(y):
-            if p <= previous:
-                monotonic_y.append(previous)
-            else:
-                monotonic_y.append(p)
-                previous = p
+        sorted_y, source = _monotonic(sorted_y)
+        sorted_index = sorted_index[source]
+
+    y = np.empty(len(durations))
+    y[order] = sorted_y
 
-        y = np.flip(monotonic_y)
+    if return_index:
+        index = np.empty(len(durations), dtype=np.int64)
+        index[order] = sorted_index
+        return y, index
 
     return y
 
@@ -310,7 +820,9 @@ DataPoint = namedtuple("DataPoint", ["index", "value"])
 def multiple_best_intervals(arg, duration, number):
     """Compute multiple best intervals
 
-    TODO: This function should return a list of {'start_index': v, 'stop_index': v, 'index': v, 'value': v}
+    See top_intervals() for the start and stop indices of the intervals and for computing
+    the intervals of multiple durations at once.
+
     Parameters
     ----------
     arg : pd.Stream
@@ -340,3 +852,67 @@ def multiple_best_intervals(arg, duration, number):
         moving_average.loc[overlap_min_index:overlap_max_index] = np.nan
 
     return mean_max_bests
+
+
+Interval = namedtuple("Interval", ["start", "stop", "value"])
+
+
+def top_intervals(y, durations, number, mask=None, value=0.0):
+    """Compute multiple best non-overlapping intervals for multiple durations
+
+    For every duration the best interval is selected first, then the best interval that does
+    not overlap with it, and so on. All durations share one cumulative sum of the stream.
+
+    Parameters
+    ----------
+    y : array-like
+        Power stream
+    durations : array-like of int
+        Durations of the intervals in seconds
+    number : int
+        Maximum number of intervals per duration
+    mask : array-like of bool, optional
+        default=None, which means no masking
+    value : number, optional
+        Value to use for replacement, default=0.0
+
+    Returns
+    -------
+    list of list of Interval
+        Intervals for every duration, sorted from best to worst. *stop* is exclusive, so
+        ``y[start:stop]`` are the samples of the interval. Intervals with missing values are
+        excluded. Less than *number* intervals are returned when there is no room for more
+        non-overlapping intervals.
+    """
+    y = mask_fill(y, mask=mask, value=value)
+    y = np.asarray(y, dtype=float)
+    durations = _validate_durations(durations)
+
+    # Intervals with missing values are excluded, like pandas' rolling mean does
+    missing = np.isnan(y)
+    energy = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, y))])
+    n_missing = np.concatenate([[0], np.cumsum(missing)])
+
+    rv = []
+    for duration in durations:
+        intervals = []
+        rv.append(intervals)
+        if duration >= len(energy):
+            continue
+
+        # means[start] is the mean of y[start:start + duration]
+        means = energy[duration:] - energy[:-duration]
+        means /= duration
+        means[n_missing[duration:] - n_missing[:-duration] > 0] = -np.inf
+
+        for i in range(number):
+            start = means.argmax()
+            if means[start] == -np.inf:
+                break
+
+            intervals.append(Interval(start, start + duration, means[start]))
+
+            # Intervals that overlap with the selected interval are excluded
+            means[max(0, start - duration + 1) : start + duration] = -np.inf
+
+    return rv
@@ -0,0 +1,358 @@
+import numpy as np
+import pandas as pd
+
+from .core import _best_energy_windows_ending, _monotonic, _validate_durations
+
+
+class SeasonCurve:
+    """Season-best mean-max curve
+
+    Running envelope (best value for every duration) of the mean-max curves of multiple
+    activities, together with the date and activity of every best value. Adding an activity
+    only compares its curve with the envelope, so the mean-max curves of earlier activities
+    never have to be recomputed.
+
+    When a *window* is set the envelope only covers the last *window* days. The curves that can
+    still become the best for a duration after older activities expire are kept: a value is
+    dropped as soon as a more recent activity has an equal or better value for that duration.
+
+    Parameters
+    ----------
+    durations : array-like of int, optional
+        Durations in seconds of the curves that will be added (the default is None, which
+        implies curves with every duration from 1 second onwards, like mean_max() returns)
+    window : int, optional
+        Length of the window in days (the default is None, which implies no window)
+    """
+
+    def __init__(self, durations=None, window=None):
+        self.durations = None
+        if durations is not None:
+            self.durations = _validate_durations(durations)
+        self.window = window
+
+        size = 0 if self.durations is None else len(self.durations)
+        self.values = np.full(size, np.nan)
+        self.dates = np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+        self.activities = np.full(size, None, dtype=object)
+
+        # Candidate curves that can still become the best after expiring activities
+        self._curves = np.empty((0, size))
+        self._curve_dates = np.empty(0, dtype="datetime64[ns]")
+        self._curve_activities = np.empty(0, dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _grow(self, size):
+        extra = size - len(self.values)
+        if extra <= 0:
+            return
+
+        self.values = np.append(self.values, np.full(extra, np.nan))
+        self.dates = np.append(
+            self.dates, np.full(extra, np.datetime64("NaT"), dtype="datetime64[ns]")
+        )
+        self.activities = np.append(self.activities, np.full(extra, None, dtype=object))
+        self._curves = np.hstack(
+            [self._curves, np.full((len(self._curves), extra), np.nan)]
+        )
+
+    def _align(self, curve):
+        """Align a mean-max curve with the durations of the envelope"""
+        if isinstance(curve, pd.Series) and isinstance(curve.index, pd.TimedeltaIndex):
+            durations = _validate_durations(curve.index.total_seconds())
+            values = curve.values.astype(float)
+        else:
+            values = np.asarray(curve, dtype=float)
+            if self.durations is None:
+                durations = np.arange(1, len(values) + 1)
+            else:
+                durations = self.durations[: len(values)]
+
+        if self.durations is None:
+            size = durations.max() if len(durations) else 0
+            self._grow(size)
+            aligned = np.full(len(self.values), np.nan)
+            aligned[durations - 1] = values
+        else:
+            aligned = np.full(len(self.values), np.nan)
+            positions = np.searchsorted(self.durations, durations)
+            positions = np.minimum(positions, len(self.durations) - 1)
+            matches = self.durations[positions] == durations
+            aligned[positions[matches]] = values[matches]
+
+        return aligned
+
+    def update(self, curve, date, activity=None):
+        """Add the mean-max curve of an activity
+
+        Parameters
+        ----------
+        curve : array-like or pd.Series
+            Mean-max curve, for example the output of mean_max() or the .sweat.mean_max()
+            accessor. A series with a TimedeltaIndex is aligned on its index.
+        date : datetime-like
+            Date of the activity
+        activity : hashable, optional
+            Identifier of the activity
+
+        Returns
+        -------
+        bool
+            True when the envelope changed
+        """
+        curve = self._align(curve)
+        date = pd.Timestamp(date).to_datetime64()
+
+        if self.window is not None:
+            curve = self._add_candidate(curve, date, activity)
+
+        # Comparisons with nan are False, so missing values never replace an existing value
+        improved = (curve > self.values) | (np.isnan(self.values) & ~np.isnan(curve))
+        self.values[improved] = curve[improved]
+        self.dates[improved] = date
+        self.activities[improved] = activity
+
+        return bool(improved.any())
+
+    def _add_candidate(self, curve, date, activity):
+        newer = self._curve_dates >= date
+        if newer.any():
+            # Values that are not better than those of more recent activities can never
+            # become the best value of the window.
+            best_newer = np.fmax.reduce(self._curves[newer], axis=0)
+            keep = (curve > best_newer) | np.isnan(best_newer)
+            curve = np.where(keep, curve, np.nan)
+
+        older = ~newer
+        if older.any():
+            dominated = self._curves[older] <= curve
+            self._curves[older] = np.where(dominated, np.nan, self._curves[older])
+
+        self._curves = np.vstack([self._curves, curve])
+        self._curve_dates = np.append(self._curve_dates, date)
+        activities = np.empty(1, dtype=object)
+        activities[0] = activity
+        self._curve_activities = np.append(self._curve_activities, activities)
+        self._drop_curves(np.isnan(self._curves).all(axis=1))
+
+        return curve
+
+    def _drop_curves(self, drop):
+        self._curves = self._curves[~drop]
+        self._curve_dates = self._curve_dates[~drop]
+        self._curve_activities = self._curve_activities[~drop]
+
+    def expire(self, date=None):
+        """Expire activities that fall outside of the window
+
+        Only the durations of which the best value expired are recomputed, from the candidate
+        curves that are kept.
+
+        Parameters
+        ----------
+        date : datetime-like, optional
+            Last day of the window (the default is None, which implies the date of the most
+            recent activity)
+
+        Returns
+        -------
+        bool
+            True when the envelope changed
+        """
+        if self.window is None:
+            raise ValueError("Expiring activities requires a window")
+
+        if date is None:
+            if len(self._curve_dates) == 0:
+                return False
+            date = self._curve_dates.max()
+
+        cutoff = (pd.Timestamp(date) - pd.Timedelta(days=self.window)).to_datetime64()
+        self._drop_curves(self._curve_dates <= cutoff)
+
+        expired = self.dates <= cutoff
+        if not expired.any():
+            return False
+
+        self.values[expired] = np.nan
+        self.dates[expired] = np.datetime64("NaT")
+        self.activities[expired] = None
+
+        candidates = self._curves[:, expired]
+        has_candidate = ~np.isnan(candidates).all(axis=0)
+        if has_candidate.any():
+            best = np.nanargmax(candidates[:, has_candidate], axis=0)
+            positions = np.flatnonzero(expired)[has_candidate]
+            self.values[positions] = candidates[:, has_candidate][
+                best, np.arange(len(best))
+            ]
+            self.dates[positions] = self._curve_dates[best]
+            self.activities[positions] = self._curve_activities[best]
+
+        return True
+
+    def to_frame(self):
+        """Season-best curve as a data frame
+
+        Returns
+        -------
+        pd.DataFrame
+            Data frame with a TimedeltaIndex of the durations and the "mean_max", "date" and
+            "activity" columns
+        """
+        if self.durations is None:
+            durations = np.arange(1, len(self.values) + 1)
+        else:
+            durations = self.durations
+
+        return pd.DataFrame(
+            dict(mean_max=self.values, date=self.dates, activity=self.activities),
+            index=pd.to_timedelta(durations, unit="s"),
+        )
+
+    def save(self, path):
+        """Save the season curve to a .npz file
+
+        Activity identifiers are stored as strings.
+
+        Parameters
+        ----------
+        path : str or Path
+        """
+        np.savez(
+            path,
+            durations=np.array([]) if self.durations is None else self.durations,
+            has_durations=self.durations is not None,
+            window=np.nan if self.window is None else self.window,
+            values=self.values,
+            dates=self.dates,
+            activities=self.activities.astype(str),
+            curves=self._curves,
+            curve_dates=self._curve_dates,
+            curve_activities=self._curve_activities.astype(str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a season curve from a .npz file
+
+        Parameters
+        ----------
+        path : str or Path
+
+        Returns
+        -------
+        SeasonCurve
+        """
+        with np.load(path) as data:
+            durations = data["durations"] if data["has_durations"] else None
+            window = None if np.isnan(data["window"]) else data["window"].item()
+            season_curve = cls(durations=durations, window=window)
+
+            season_curve.values = data["values"]
+            season_curve.dates = data["dates"]
+            season_curve.activities = data["activities"].astype(object)
+            season_curve.activities[np.isnat(season_curve.dates)] = None
+            season_curve._curves = data["curves"]
+            season_curve._curve_dates = data["curve_dates"]
+            season_curve._curve_activities = data["curve_activities"].astype(object)
+
+        return season_curve
+
+
+class MeanMaxAccumulator:
+    """Streaming mean-max curve
+
+    Computes the mean-max curve of a stream that is fed in chunks (or sample by sample), for
+    example from a live feed or from a large file that is read in parts. Only the last
+    *max_duration* samples of the cumulative energy are kept, so memory usage does not depend
+    on the length of the stream. After feeding all data the curve is identical to
+    mean_max(y)[:max_duration] of the concatenated stream.
+
+    Parameters
+    ----------
+    max_duration : int
+        Longest duration in seconds of the curve
+    """
+
+    def __init__(self, max_duration):
+        self.max_duration = int(_validate_durations([max_duration])[0])
+        self.n_samples = 0
+
+        self._durations = np.arange(1, self.max_duration + 1)
+        self._energy_diff = np.full(self.max_duration, -np.inf)
+        self._index = np.full(self.max_duration, -1, dtype=np.int64)
+
+        # Last values of the cumulative energy and the running sum that continues it
+        self._energy = np.empty(0)
+        self._running_sum = 0.0
+
+    def update(self, chunk):
+        """Add samples to the stream
+
+        Parameters
+        ----------
+        chunk : array-like or number
+            Power samples
+        """
+        chunk = np.atleast_1d(np.asarray(chunk, dtype=float))
+        if len(chunk) == 0:
+            return
+
+        # Continue the accumulation from the running sum so that the cumulative energy is
+        # identical to the cumulative energy of the concatenated stream.
+        missing = np.isnan(chunk)
+        energy = np.cumsum(
+            np.concatenate([[self._running_sum], np.where(missing, 0.0, chunk)])
+        )
+        self._running_sum = energy[-1]
+        energy = energy[1:]
+        energy[missing] = np.nan
+
+        energy = np.concatenate([self._energy, energy])
+        first_end = len(self._energy)
+        start = self.n_samples - first_end
+        self.n_samples += len(chunk)
+
+        durations = self._durations[self._durations < len(energy)]
+        energy_diff, offsets = _best_energy_windows_ending(energy, durations, first_end)
+
+        # Ties keep the earliest window, like mean_max() does
+        improved = energy_diff > self._energy_diff[: len(durations)]
+        self._energy_diff[: len(durations)][improved] = energy_diff[improved]
+        self._index[: len(durations)][improved] = start + offsets[improved] + 1
+
+        self._energy = energy[-self.max_duration :]
+
+    def curve(self, monotonic=False, return_index=False):
+        """Mean-max curve of the samples so far
+
+        Parameters
+        ----------
+        monotonic: bool, optional
+            Make the curve monotonically decreasing (the default is False)
+        return_index: bool, optional
+            Also return the start index of the best effort for every duration (the default is
+            False), see mean_max().
+
+        Returns
+        -------
+        ndarray or (ndarray, ndarray of int)
+        """
+        length = min(self.max_duration, max(self.n_samples - 1, 0))
+        energy_diff = self._energy_diff[:length].copy()
+        index = self._index[:length].copy()
+
+        energy_diff[energy_diff == -np.inf] = np.nan
+        y = energy_diff / self._durations[:length]
+
+        if monotonic:
+            y, source = _monotonic(y)
+            index = index[source]
+
+        if return_index:
+            return y, index
+
+        return y
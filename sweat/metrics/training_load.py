@@ -0,0 +1,362 @@
+import functools
+
+import numpy as np
+import pandas as pd
+from lmfit import Parameters, minimize
+from scipy.signal import lfilter
+
+from ..utils import apply_many
+
+
+class TrainingLoad:
+    """Performance management (CTL, ATL and TSB) of many athletes
+
+    Daily stress scores (see sweat.metrics.power.stress_score()) are summed per athlete and
+    day, and the chronic (CTL) and acute (ATL) training load are computed as exponentially
+    weighted averages of the daily stress with the time constants *ctl_days* and *atl_days*:
+    load[t] = load[t - 1] * e ** (-1 / days) + stress[t] * (1 - e ** (-1 / days)).
+    The training stress balance (TSB) of a day is the CTL minus the ATL of the day before.
+
+    All athletes are computed at once. Adding stress scores only recomputes the days from
+    the earliest day that changed, so appending new days does not recompute the history.
+
+    Parameters
+    ----------
+    ctl_days : number, optional
+        Time constant in days of the CTL (the default is 42)
+    atl_days : number, optional
+        Time constant in days of the ATL (the default is 7)
+    """
+
+    def __init__(self, ctl_days=42, atl_days=7):
+        self.ctl_days = ctl_days
+        self.atl_days = atl_days
+
+        self.athletes = pd.Index([])
+        self.start = None
+        self._n_days = 0
+
+        self._stress = np.zeros((0, 0))
+        self._ctl = np.zeros((0, 0))
+        self._atl = np.zeros((0, 0))
+
+    @property
+    def dates(self):
+        """Days of the training load, a pd.DatetimeIndex"""
+        if self.start is None:
+            return pd.DatetimeIndex([])
+
+        return pd.date_range(self.start, periods=self._n_days, freq="D")
+
+    @property
+    def stress(self):
+        """Daily stress of shape (athletes, days)"""
+        return self._stress[:, : self._n_days]
+
+    @property
+    def ctl(self):
+        """Chronic training load of shape (athletes, days)"""
+        return self._ctl[:, : self._n_days]
+
+    @property
+    def atl(self):
+        """Acute training load of shape (athletes, days)"""
+        return self._atl[:, : self._n_days]
+
+    @property
+    def tsb(self):
+        """Training stress balance of shape (athletes, days)"""
+        tsb = np.zeros((len(self.athletes), self._n_days))
+        tsb[:, 1:] = self.ctl[:, :-1] - self.atl[:, :-1]
+
+        return tsb
+
+    def _resize(self, n_athletes, n_days):
+        rows, capacity = self._stress.shape
+        if n_athletes <= rows and n_days <= capacity:
+            return
+
+        # The capacity for days grows geometrically so that appending days one at a time does
+        # not copy the history every time.
+        if n_days > capacity:
+            capacity = max(n_days, 2 * capacity)
+
+        for name in ["_stress", "_ctl", "_atl"]:
+            resized = np.zeros((max(n_athletes, rows), capacity))
+            resized[:rows, : self._n_days] = getattr(self, name)[:, : self._n_days]
+            setattr(self, name, resized)
+
+    def update(self, athletes, dates, stress, until=None):
+        """Add stress scores
+
+        Parameters
+        ----------
+        athletes : array-like or hashable
+            Athlete of every stress score (a single athlete applies to all scores)
+        dates : array-like of datetime-like
+            Date of every stress score
+        stress : array-like of number
+            Stress scores. Multiple scores of the same athlete and day are summed.
+        until : datetime-like, optional
+            Extend the training load up to this day (the default is None, which implies the
+            last day with a stress score)
+        """
+        dates = pd.DatetimeIndex(pd.to_datetime(np.atleast_1d(dates))).normalize()
+        stress = np.broadcast_to(np.asarray(stress, dtype=float), dates.shape)
+        if np.ndim(athletes) == 0:
+            athletes = [athletes] * len(dates)
+        athletes = pd.Index(athletes)
+
+        new_athletes = athletes.unique().difference(self.athletes, sort=False)
+        self.athletes = self.athletes.append(new_athletes)
+        rows = self.athletes.get_indexer(athletes)
+
+        if len(dates) == 0 and until is None:
+            self._resize(len(self.athletes), self._n_days)
+            return
+
+        last = dates.max() if until is None else pd.Timestamp(until).normalize()
+        if len(dates):
+            last = max(last, dates.max())
+        first = dates.min() if len(dates) else last
+
+        if self.start is None:
+            self.start = first
+        elif first < self.start:
+            raise ValueError(
+                f"Stress scores before the first day ({self.start.date()}) can not be added"
+            )
+
+        days = ((dates - self.start) // pd.Timedelta(days=1)).values.astype(np.int64)
+        n_days = max(self._n_days, (last - self.start).days + 1)
+        self._resize(len(self.athletes), n_days)
+
+        np.add.at(self._stress, (rows, days), stress)
+
+        # Only the new days and the days from the earliest day that changed are recomputed
+        changed = min(days.min(), self._n_days) if len(days) else self._n_days
+        self._n_days = n_days
+        self._recompute(changed)
+
+    def _recompute(self, first_day):
+        if first_day >= self._n_days:
+            return
+
+        stress = self._stress[:, first_day : self._n_days]
+        for name, time_constant in [("_ctl", self.ctl_days), ("_atl", self.atl_days)]:
+            load = getattr(self, name)
+            decay = np.exp(-1 / time_constant)
+
+            previous = np.zeros(len(self.athletes))
+            if first_day > 0:
+                previous = load[:, first_day - 1]
+
+            load[:, first_day : self._n_days], _ = lfilter(
+                [1 - decay],
+                [1, -decay],
+                stress,
+                axis=1,
+                zi=(decay * previous)[:, np.newaxis],
+            )
+
+    def to_frame(self):
+        """Training load as a data frame
+
+        Returns
+        -------
+        pd.DataFrame
+            Data frame with an (athlete, date) MultiIndex and the "stress", "ctl", "atl" and
+            "tsb" columns
+        """
+        index = pd.MultiIndex.from_product(
+            [self.athletes, self.dates], names=["athlete", "date"]
+        )
+
+        return pd.DataFrame(
+            dict(
+                stress=self.stress.ravel(),
+                ctl=self.ctl.ravel(),
+                atl=self.atl.ravel(),
+                tsb=self.tsb.ravel(),
+            ),
+            index=index,
+        )
+
+
+BANISTER_MODEL_PARAMS = ["p0", "k1", "k2", "tau1", "tau2"]
+
+
+def _impulse_response(load, time_constant):
+    """Convolves the load with the kernel e ** (-t / time_constant) of the days before
+
+    The exponential kernel is applied as a first order filter, so the convolution is O(n).
+    """
+    decay = np.exp(-1 / time_constant)
+    return lfilter([0, decay], [1, -decay], load, axis=-1)
+
+
+def banister_model_predict(model_params, load):
+    """Predicts the performance with the Banister impulse-response model
+
+    performance[t] = p0 + k1 * fitness[t] - k2 * fatigue[t], where the fitness and fatigue
+    are the sums of the load of the days before t weighted by e ** (-(t - s) / tau1) and
+    e ** (-(t - s) / tau2).
+
+    Parameters
+    ----------
+    model_params : dict or lmfit.Parameters
+        Model parameters p0, k1, k2, tau1 and tau2
+    load : array-like
+        Daily load, for example the stress of TrainingLoad. Missing days count as rest days.
+
+    Returns
+    -------
+    numpy.ndarray
+        Predicted performance of every day
+    """
+    load = np.nan_to_num(np.asarray(load, dtype=float))
+    fitness = _impulse_response(load, float(model_params["tau1"]))
+    fatigue = _impulse_response(load, float(model_params["tau2"]))
+
+    return (
+        float(model_params["p0"])
+        + float(model_params["k1"]) * fitness
+        - float(model_params["k2"]) * fatigue
+    )
+
+
+def _banister_model_residuals(model_params, load, performance, mask):
+    return performance[mask] - banister_model_predict(model_params, load)[mask]
+
+
+def _load_performance(load, performance):
+    if isinstance(load, pd.Series) and isinstance(performance, pd.Series):
+        performance = performance.reindex(load.index)
+
+    load = np.asarray(load, dtype=float)
+    performance = np.asarray(performance, dtype=float)
+    if load.shape != performance.shape:
+        raise ValueError("load and performance should have the same length")
+
+    return load, performance
+
+
+def _initial_banister_params(load, performance, mask, **kwargs):
+    tau1 = kwargs.get("tau1", 42)
+    tau2 = kwargs.get("tau2", 7)
+
+    # p0, k1 and k2 are linear in the model, their default initial values are the least
+    # squares solution for the initial time constants.
+    design = np.column_stack(
+        [
+            np.ones(mask.sum()),
+            _impulse_response(np.nan_to_num(load), tau1)[mask],
+            -_impulse_response(np.nan_to_num(load), tau2)[mask],
+        ]
+    )
+    p0, k1, k2 = np.linalg.lstsq(design, performance[mask], rcond=None)[0]
+
+    model_params = Parameters()
+    model_params.add_many(
+        ("p0", kwargs.get("p0", p0)),
+        ("k1", kwargs.get("k1", max(k1, 0)), True, 0),
+        ("k2", kwargs.get("k2", max(k2, 0)), True, 0),
+        ("tau1", tau1, True, 1),
+        ("tau2", tau2, True, 1),
+    )
+
+    return model_params
+
+
+def banister_model(load, performance, method="leastsq", **kwargs):
+    """Fits the Banister impulse-response (fitness-fatigue) model
+
+    Source:
+    Banister, E. W., Calvert, T. W., Savage, M. V., & Bach, T. (1975). A systems model of
+    training for athletic performance. Australian Journal of Sports Medicine, 7(3), 57-61.
+
+    Parameters
+    ----------
+    load : array-like
+        Daily load, for example the stress of TrainingLoad
+    performance : array-like
+        Performance markers (for example CP estimates of PowerDurationRegressor) of the same
+        days, NaN on days without a marker. When load and performance are both series the
+        performance is aligned to the index of the load.
+    method : str, optional
+        lmfit minimization method (the default is "leastsq")
+    **kwargs
+        Initial model parameters p0, k1, k2, tau1 (the default is 42) and tau2 (the default
+        is 7). The defaults of p0, k1 and k2 are the least squares solution for the initial
+        time constants.
+
+    Returns
+    -------
+    tuple of (lmfit.MinimizerResult, numpy.ndarray)
+        The result of the minimization and the predicted performance of every day
+    """
+    load, performance = _load_performance(load, performance)
+    mask = ~np.isnan(performance)
+
+    model_params = _initial_banister_params(load, performance, mask, **kwargs)
+
+    model = minimize(
+        fcn=_banister_model_residuals,
+        params=model_params,
+        method=method,
+        args=(load, performance, mask),
+    )
+
+    predictions = banister_model_predict(model.params, load)
+
+    return model, predictions
+
+
+def _fit_athlete(item, method, kwargs):
+    load, performance = item
+    model, _ = banister_model(load, performance, method=method, **kwargs)
+
+    record = {name: model.params[name].value for name in BANISTER_MODEL_PARAMS}
+    record["n_samples"] = model.ndata
+    record["rmse"] = np.sqrt(np.mean(model.residual ** 2))
+    record["nfev"] = model.nfev
+
+    return record
+
+
+def banister_model_many(
+    athletes, n_jobs=None, chunk_size=10, method="leastsq", **kwargs
+):
+    """Fits the Banister impulse-response model to many athletes
+
+    Every athlete is fitted separately with banister_model(), in a process pool with
+    sweat.utils.apply_many(). An athlete with fewer performance markers than parameters
+    can not be fitted and gets an "error".
+
+    Parameters
+    ----------
+    athletes : dict or list
+        (load, performance) pairs by athlete (a list is keyed by position)
+    n_jobs : int, optional
+        Number of processes, see sweat.utils.apply_many() (the default is None)
+    chunk_size : int, optional
+        Number of athletes per task (the default is 10)
+    method : str, optional
+        lmfit minimization method (the default is "leastsq")
+    **kwargs
+        Initial model parameters, see banister_model()
+
+    Returns
+    -------
+    pd.DataFrame
+        Data frame indexed by athlete with the fitted parameters and the "n_samples" (number
+        of performance markers), "rmse", "nfev" and "error" columns
+    """
+    return apply_many(
+        functools.partial(_fit_athlete, method=method, kwargs=kwargs),
+        athletes,
+        index="athlete",
+        columns=BANISTER_MODEL_PARAMS + ["n_samples", "rmse", "nfev"],
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+    )
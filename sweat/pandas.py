@@ -1,21 +1,65 @@
+import weakref
 from functools import wraps
-from typing import List, Union
+from typing import List, Optional, Union
 
 import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
+from pandas.tseries.frequencies import to_offset
 
 from .constants import DataTypeEnum
 from .metrics import core
 
 
+# Validation results by id() of the index and sample rate. Indexes are immutable, so the
+# result is valid for the lifetime of the index. Entries are removed when the index is
+# garbage collected, so a reused id() can not return a stale result.
+_sample_rate_cache = {}
+
+
+def _is_sampled_at(index, sample_rate):
+    """Checks whether the index is sampled at a regular interval of sample_rate.
+
+    Args:
+        index: The index to check.
+        sample_rate: The expected interval as a numpy timedelta64.
+
+    Returns:
+        True if every interval of the index equals sample_rate.
+    """
+    if not isinstance(index, (pd.DatetimeIndex, pd.TimedeltaIndex)):
+        return False
+
+    if index.freq is not None and index.freq == to_offset(pd.Timedelta(sample_rate)):
+        return True
+
+    if index.hasnans:
+        return False
+
+    step = sample_rate // np.timedelta64(1, "ns")
+    return bool(np.all(np.diff(index.asi8) == step))
+
+
+def _validate_sample_rate(index, sample_rate):
+    results = _sample_rate_cache.get(id(index))
+    if results is None:
+        results = _sample_rate_cache[id(index)] = {}
+        weakref.finalize(index, _sample_rate_cache.pop, id(index), None)
+
+    if sample_rate not in results:
+        results[sample_rate] = _is_sampled_at(index, sample_rate)
+
+    return results[sample_rate]
+
+
 def validate_sample_rate(sample_rate):
     def wrapper(func):
         @wraps(func)
         def wrapped(self, *args, **kwargs):
-            if not all(self._obj.index.to_series().diff()[1:] == sample_rate):
+            if not _validate_sample_rate(self._obj.index, sample_rate):
+                seconds = sample_rate / np.timedelta64(1, "s")
                 raise AttributeError(
-                    f"Data is not sampled at a regular interval of {sample_rate.tostring()}. Consider resampling first."
+                    f"Data is not sampled at a regular interval of {seconds:g}s. Consider resampling first."
                 )
             return func(self, *args, **kwargs)
 
@@ -24,6 +68,18 @@ def validate_sample_rate(sample_rate):
     return wrapper
 
 
+def _mean_max_index(result, durations=None):
+    if durations is None:
+        durations = range(1, len(result) + 1)
+
+    return pd.to_timedelta(durations, unit="s")
+
+
+def _mean_max_start(index, start_index):
+    start = index[np.maximum(start_index, 0)]
+    return start.where(start_index >= 0)
+
+
 @pd.api.extensions.register_dataframe_accessor("sweat")
 class SweatAccessor:
     def __init__(self, pandas_obj):
@@ -34,7 +90,7 @@ class SweatAccessor:
         if not isinstance(obj.index, (pd.DatetimeIndex, pd.TimedeltaIndex)):
             raise AttributeError("DataFrame Index should be a DatetimeIndex.")
 
-        if not all(obj.index.to_series().diff()[1:] == np.timedelta64(1, "s")):
+        if not _validate_sample_rate(obj.index, np.timedelta64(1, "s")):
             raise AttributeError(
                 "Data is not sampled at a regular 1s interval. Consider resampling first."
             )
@@ -50,20 +106,34 @@ class SweatAccessor:
 
     @validate_sample_rate(sample_rate=np.timedelta64(1, "s"))
     def mean_max(
-        self, columns: Union[List, str], monotonic: bool = False
+        self,
+        columns: Union[List, str],
+        monotonic: bool = False,
+        durations: Optional[List[int]] = None,
+        return_index: bool = False,
     ) -> pd.DataFrame:
         if isinstance(columns, str):
             columns = [columns]
 
         data = None
         for column in columns:
-            result = core.mean_max(self._obj[column], monotonic=monotonic)
+            result = core.mean_max(
+                self._obj[column],
+                monotonic=monotonic,
+                durations=durations,
+                return_index=return_index,
+            )
+            if return_index:
+                result, start_index = result
 
             if data is None:
-                index = pd.to_timedelta(range(1, len(result) + 1), unit="s")
-                data = pd.DataFrame(index=index)
+                data = pd.DataFrame(index=_mean_max_index(result, durations))
 
             data["mean_max_" + column] = result
+            if return_index:
+                data["mean_max_" + column + "_start"] = _mean_max_start(
+                    self._obj.index, start_index
+                )
 
         return data
 
@@ -86,7 +156,7 @@ class SweatSeriesAccessor:
         if not isinstance(obj.index, pd.DatetimeIndex):
             raise AttributeError("DataFrame Index should be a DatetimeIndex.")
 
-        if not all(obj.index.to_series().diff()[1:] == np.timedelta64(1, "s")):
+        if not _validate_sample_rate(obj.index, np.timedelta64(1, "s")):
             raise AttributeError(
                 "Data is not sampled at a regular 1s interval. Consider resampling first."
             )
@@ -95,15 +165,44 @@ class SweatSeriesAccessor:
             raise AttributeError(f"Series dtype should be numeric")
 
     @validate_sample_rate(sample_rate=np.timedelta64(1, "s"))
-    def mean_max(self, monotonic: bool = False) -> pd.Series:
+    def mean_max(
+        self,
+        monotonic: bool = False,
+        durations: Optional[List[int]] = None,
+        return_index: bool = False,
+    ) -> Union[pd.Series, pd.DataFrame]:
         """This method calculates the mean max values of the series.
 
+        Args:
+            monotonic: Make the mean max values monotonically decreasing.
+            durations: Durations in seconds to calculate the mean max values for. Defaults to all durations.
+            return_index: Also return the start of the best effort for each duration.
+
         Returns:
             A pandas series with a TimedeltaIndex.
+            When return_index=True a pandas data frame with a TimedeltaIndex is returned that also contains the start of the best efforts in the "mean_max_<name>_start" column.
         """
-        result = core.mean_max(self._obj, monotonic=monotonic)
-        index = pd.to_timedelta(range(1, len(result) + 1), unit="s")
-        return pd.Series(result, index=index, name="mean_max_" + self._obj.name)
+        result = core.mean_max(
+            self._obj,
+            monotonic=monotonic,
+            durations=durations,
+            return_index=return_index,
+        )
+        if return_index:
+            result, start_index = result
+
+        name = "mean_max_" + self._obj.name
+        index = _mean_max_index(result, durations)
+        if not return_index:
+            return pd.Series(result, index=index, name=name)
+
+        return pd.DataFrame(
+            {
+                name: result,
+                name + "_start": _mean_max_start(self._obj.index, start_index),
+            },
+            index=index,
+        )
 
     def to_timedelta_index(self):
         """This method converts the index to a relative TimedeltaIndex, returning a copy of the series with the new index.
@@ -132,15 +231,19 @@ class SweatSeriesAccessor:
 
     def time_in_zone(self, bins: List[int], labels: List[Union[int, str]]) -> pd.Series:
         """Returns a pandas.Series with the value counts for each zone.
-        This method uses the pandas.Series.value_counts() method under the hood.
+        This method uses the sweat.metrics.core.zone_counts() method under the hood.
 
         Args:
             bins: Left and right bounds for each zone.
             labels: Specifies the labels for the zones. Must be the same length as the resulting zones.
 
         Returns:
-            A pandas series with the value counts for each zones.
+            A pandas series with the value counts for each zones, in the order of the zones. Empty zones are included.
         """
-        zones = self.calculate_zones(bins, labels)
-        zones_value_counts = zones.value_counts()
-        return pd.to_timedelta(zones_value_counts, unit="s")
+        zones_value_counts = core.zone_counts(self._obj.values, bins)
+        if len(labels) != len(zones_value_counts):
+            raise ValueError(
+                "The number of labels should be equal to the number of zones"
+            )
+
+        return pd.to_timedelta(pd.Series(zones_value_counts, index=labels), unit="s")
@@ -1,11 +1,23 @@
+import functools
+
 import numpy as np
+import pandas as pd
 from sklearn.base import BaseEstimator, RegressorMixin
 from sklearn.utils.validation import check_X_y, check_array, check_is_fitted
 from scipy.optimize import curve_fit
 
+from ..metrics.core import log_spaced_durations
+from ..metrics.mean_max import SeasonCurve
+from ..utils import apply_many
+
 
 class PowerDurationRegressor(BaseEstimator, RegressorMixin):
-    """Based on: https://scikit-learn.org/stable/developers/develop.html"""
+    """Based on: https://scikit-learn.org/stable/developers/develop.html
+
+    The models are fitted with analytical Jacobians. With warm_start=True a refit starts from
+    the parameters of the previous fit instead of the initial parameters. The number of model
+    evaluations of the last fit is stored in nfev_.
+    """
 
     def __init__(
         self,
@@ -16,6 +28,7 @@ class PowerDurationRegressor(BaseEstimator, RegressorMixin):
         tau=300,
         tcp_max=1800,
         a=50,
+        warm_start=False,
     ):
         self.model = model
         self.cp = cp
@@ -24,6 +37,7 @@ class PowerDurationRegressor(BaseEstimator, RegressorMixin):
         self.tau = tau
         self.tcp_max = tcp_max
         self.a = a
+        self.warm_start = warm_start
 
     def _2_param_model(self, X, cp, w_prime, *args):
         t = X.T[0]  # X should be a (1, n) array
@@ -52,38 +66,87 @@ class PowerDurationRegressor(BaseEstimator, RegressorMixin):
             t <= self.tcp_max, result, result - a * np.log(t / self.tcp_max)
         )
 
+    def _2_param_jacobian(self, X, cp, w_prime, *args):
+        t = X.T[0]
+        return np.column_stack([np.ones_like(t), 1 / t])
+
+    def _3_param_jacobian(self, X, cp, w_prime, p_max, *args):
+        t = X.T[0]
+        denominator = t + w_prime / (p_max - cp)
+        d_p_max = (w_prime / (denominator * (p_max - cp))) ** 2
+        return np.column_stack([1 - d_p_max, t / denominator ** 2, d_p_max])
+
+    def _exp_jacobian(self, X, cp, p_max, tau, *args):
+        t = X.T[0]
+        decay = np.exp(-t / tau)
+        return np.column_stack([1 - decay, decay, (p_max - cp) * decay * t / tau ** 2])
+
+    def _omni_jacobian(self, X, cp, p_max, w_prime, a, *args):
+        t = X.T[0]
+        decay = np.exp(-t * (p_max - cp) / w_prime)
+        d_w_prime = (1 - decay) / t - decay * (p_max - cp) / w_prime
+        d_a = np.where(t <= self.tcp_max, 0.0, -np.log(t / self.tcp_max))
+        return np.column_stack([1 - decay, decay, d_w_prime, d_a])
+
     def _model_selection(self):
         if self.model == "2 param":
             func = self._2_param_model
+            jac = self._2_param_jacobian
             params = ["cp", "w_prime"]
-            return func, params
+            return func, jac, params
         elif self.model == "3 param":
             func = self._3_param_model
+            jac = self._3_param_jacobian
             params = ["cp", "w_prime", "p_max"]
-            return func, params
+            return func, jac, params
         elif self.model == "exponential":
             func = self._exp_model
+            jac = self._exp_jacobian
             params = ["cp", "p_max", "tau"]
-            return func, params
+            return func, jac, params
         elif self.model == "omni":
             func = self._omni_model
+            jac = self._omni_jacobian
             params = ["cp", "p_max", "w_prime", "a"]
-            return func, params
+            return func, jac, params
         else:
             raise ValueError(f"self.model has an invalid value: {self.model}")
 
-    def fit(self, X, y):
+    def _initial_params(self, params):
+        if self.warm_start and getattr(self, "is_fitted_", False):
+            return [getattr(self, f"{name}_", getattr(self, name)) for name in params]
+
+        return [getattr(self, param_name) for param_name in params]
+
+    def fit(self, X, y, sample_weight=None):
         self.n_features_in_ = 1
         X, y = check_X_y(X, y, ensure_min_samples=2)
 
-        func, params = self._model_selection()
+        sigma = None
+        if sample_weight is not None:
+            sample_weight = np.broadcast_to(
+                np.asarray(sample_weight, dtype=float), y.shape
+            )
+            sigma = 1 / np.sqrt(sample_weight)
+
+        func, jac, params = self._model_selection()
+        initial_params = self._initial_params(params)
 
-        initial_params = [getattr(self, param_name) for param_name in params]
-        fitted_params, _ = curve_fit(f=func, xdata=X, ydata=y, p0=initial_params)
+        nfev = 0
+
+        def counted_func(*args):
+            nonlocal nfev
+            nfev += 1
+            return func(*args)
+
+        fitted_params, _ = curve_fit(
+            f=counted_func, xdata=X, ydata=y, p0=initial_params, sigma=sigma, jac=jac
+        )
 
         for name, value in zip(params, fitted_params):
             setattr(self, f"{name}_", value)
 
+        self.nfev_ = nfev
         self.is_fitted_ = True
 
         return self
@@ -92,7 +155,7 @@ class PowerDurationRegressor(BaseEstimator, RegressorMixin):
         check_is_fitted(self)
         X = check_array(X)
 
-        func, params = self._model_selection()
+        func, _, params = self._model_selection()
 
         args = []
         for param_name in params:
@@ -102,3 +165,261 @@ class PowerDurationRegressor(BaseEstimator, RegressorMixin):
 
     def _more_tags(self):
         return {"poor_score": True}
+
+
+FIT_MANY_PARAMS = ["cp", "w_prime", "p_max", "tau", "a"]
+
+# Durations in seconds that fit_mean_max() uses by default, per model
+MEAN_MAX_FIT_DURATIONS = {"2 param": (120, 1200)}
+
+
+def _prepare_curve(curve, durations):
+    """Returns the durations (as X) and values (as y) of a mean-max curve without missing values"""
+    if isinstance(curve, pd.Series) and isinstance(curve.index, pd.TimedeltaIndex):
+        X = curve.index.total_seconds().values
+        y = curve.values.astype(float)
+    else:
+        y = np.asarray(curve, dtype=float)
+        X = durations[: len(y)]
+
+    valid = ~np.isnan(y)
+    return X[valid, np.newaxis], y[valid]
+
+
+def _previous_params(previous):
+    """Fitted parameters by (athlete, model) of a fit_many() result"""
+    if previous is None:
+        return {}
+
+    previous = previous[previous["error"].isna()]
+    columns = [name for name in FIT_MANY_PARAMS if name in previous.columns]
+
+    return {
+        key: {name: value for name, value in row.items() if not np.isnan(value)}
+        for key, row in previous[columns].iterrows()
+    }
+
+
+def _fit_curve(item, params):
+    curve, model, previous_params = item
+    X, y = _prepare_curve(curve, np.arange(1, len(curve) + 1, dtype=float))
+
+    regressor = PowerDurationRegressor(model=model, **{**params, **previous_params})
+    regressor.fit(X, y)
+
+    residuals = y - regressor.predict(X)
+    record = dict(
+        n_samples=len(y),
+        rmse=np.sqrt(np.mean(residuals ** 2)),
+        mae=np.mean(np.abs(residuals)),
+        nfev=regressor.nfev_,
+    )
+    for name in FIT_MANY_PARAMS:
+        if hasattr(regressor, f"{name}_"):
+            record[name] = getattr(regressor, f"{name}_")
+
+    return record
+
+
+def fit_many(
+    curves, models=("2 param",), n_jobs=None, chunk_size=100, previous=None, **params,
+):
+    """Fits power duration models to the mean-max curves of many athletes
+
+    Every athlete and model is fitted with PowerDurationRegressor, in a process pool with
+    sweat.utils.apply_many(). Failed fits are listed in the "error" column.
+
+    Parameters
+    ----------
+    curves : dict or list
+        Mean-max curves by athlete (a list is keyed by position). A curve is a pd.Series with a
+        TimedeltaIndex of the durations (like the .sweat.mean_max() accessor returns) or an
+        array-like with a value for every duration from 1 second onwards (like
+        sweat.metrics.core.mean_max() returns). Missing values are ignored.
+    models : list of str, optional
+        Models to fit, see PowerDurationRegressor (the default is ("2 param",))
+    n_jobs : int, optional
+        Number of processes, see sweat.utils.apply_many() (the default is None)
+    chunk_size : int, optional
+        Number of fits per task (the default is 100)
+    previous : pd.DataFrame, optional
+        Result of an earlier fit_many() call. Its fitted parameters are used as the initial
+        parameters (warm start) of the same athlete and model.
+    **params
+        Initial parameters, passed to PowerDurationRegressor
+
+    Returns
+    -------
+    pd.DataFrame
+        Data frame with an (athlete, model) MultiIndex and the "n_samples", "rmse", "mae",
+        "nfev" (number of model evaluations), fitted parameter and "error" columns. Parameters
+        that a model does not have are nan.
+    """
+    if not isinstance(curves, dict):
+        curves = dict(enumerate(curves))
+
+    previous = _previous_params(previous)
+    items = {
+        (key, model): (curve, model, previous.get((key, model), {}))
+        for key, curve in curves.items()
+        for model in models
+    }
+
+    return apply_many(
+        functools.partial(_fit_curve, params=params),
+        items,
+        index=["athlete", "model"],
+        columns=["n_samples", "rmse", "mae", "nfev"] + FIT_MANY_PARAMS,
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+    )
+
+
+def fit_rolling(curves, dates, window=42, model="3 param", durations=None, **params):
+    """Fits a power duration model on the rolling best mean-max curve of every day
+
+    The best mean-max curve of the last *window* days is maintained incrementally with a
+    SeasonCurve. The model is only refitted on days on which that curve changed, starting
+    from the parameters of the previous fit (warm start).
+
+    Parameters
+    ----------
+    curves : list
+        Mean-max curves of the activities, see SeasonCurve.update()
+    dates : list of datetime-like
+        Dates of the activities
+    window : int, optional
+        Length of the window in days (the default is 42)
+    model : str, optional
+        Model to fit, see PowerDurationRegressor (the default is "3 param")
+    durations : array-like of int, optional
+        Durations in seconds of the curves, see SeasonCurve (the default is None)
+    **params
+        Initial parameters, passed to PowerDurationRegressor
+
+    Returns
+    -------
+    pd.DataFrame
+        Data frame with a DatetimeIndex of every day from the first to the last activity, the
+        fitted parameter columns and the "refit" (whether the model was refitted that day) and
+        "error" columns.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).dt.normalize()
+    order = np.argsort(dates.values, kind="stable")
+    days = pd.date_range(dates.min(), dates.max(), freq="D")
+
+    season_curve = SeasonCurve(durations=durations, window=window)
+    regressor = PowerDurationRegressor(model=model, warm_start=True, **params)
+    _, _, param_names = regressor._model_selection()
+
+    records = []
+    record = dict.fromkeys(param_names, np.nan)
+    position = 0
+    for day in days:
+        changed = False
+        while position < len(order) and dates.iloc[order[position]] == day:
+            curve = curves[order[position]]
+            changed |= season_curve.update(curve, day)
+            position += 1
+        changed |= season_curve.expire(day)
+
+        if changed:
+            record = dict(refit=True, error=None)
+            X, y = _season_curve_X_y(season_curve)
+            try:
+                regressor.fit(X, y)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            else:
+                for name in param_names:
+                    record[name] = getattr(regressor, f"{name}_")
+        else:
+            record = {**record, "refit": False}
+
+        records.append(record)
+
+    columns = param_names + ["refit", "error"]
+    return pd.DataFrame(records, index=days, columns=columns)
+
+
+def _season_curve_X_y(season_curve):
+    if season_curve.durations is None:
+        durations = np.arange(1, len(season_curve) + 1, dtype=float)
+    else:
+        durations = season_curve.durations.astype(float)
+
+    valid = ~np.isnan(season_curve.values)
+    return durations[valid, np.newaxis], season_curve.values[valid]
+
+
+def fit_mean_max(
+    curve,
+    model="2 param",
+    min_duration=None,
+    max_duration=None,
+    number=50,
+    weights=None,
+    **params,
+):
+    """Fits a power duration model on a log-spaced subset of a mean-max curve
+
+    A mean-max curve has a value for every second, so most of its values are for long
+    durations. Fitting on log-spaced durations instead is much faster and does not over-weight
+    the long durations.
+
+    Parameters
+    ----------
+    curve : array-like or pd.Series
+        Mean-max curve: the output of sweat.metrics.core.mean_max() (a value for every
+        duration from 1 second onwards) or of the .sweat.mean_max() accessor (a pd.Series with
+        a TimedeltaIndex). Missing values are ignored.
+    model : str, optional
+        Model to fit, see PowerDurationRegressor (the default is "2 param")
+    min_duration : int, optional
+        Shortest duration in seconds to fit on (the default is None, which implies 120 for
+        the "2 param" model and the shortest duration of the curve otherwise)
+    max_duration : int, optional
+        Longest duration in seconds to fit on (the default is None, which implies 1200 for
+        the "2 param" model and the longest duration of the curve otherwise)
+    number : int, optional
+        Number of log-spaced durations to fit on (the default is 50)
+    weights : callable, optional
+        Function that returns the weight of every duration in seconds, for example
+        ``lambda t: 1 / t`` (the default is None, which implies equal weights)
+    **params
+        Initial parameters, passed to PowerDurationRegressor
+
+    Returns
+    -------
+    PowerDurationRegressor
+        Fitted regressor
+    """
+    X, y = _prepare_curve(curve, np.arange(1, len(curve) + 1, dtype=float))
+    durations = X[:, 0]
+
+    default_min_duration, default_max_duration = MEAN_MAX_FIT_DURATIONS.get(
+        model, (None, None)
+    )
+    if min_duration is None:
+        min_duration = default_min_duration
+        if min_duration is None:
+            min_duration = durations.min() if len(durations) else 1
+    if max_duration is None:
+        max_duration = default_max_duration
+        if max_duration is None:
+            max_duration = durations.max() if len(durations) else 1
+
+    in_range = (durations >= min_duration) & (durations <= max_duration)
+    durations, y = durations[in_range], y[in_range]
+
+    targets = log_spaced_durations(
+        stop=max(max_duration, 1), number=number, start=max(min_duration, 1)
+    )
+    selected = np.unique(np.searchsorted(durations, targets))
+    selected = selected[selected < len(durations)]
+    X, y = durations[selected, np.newaxis], y[selected]
+
+    sample_weight = None if weights is None else weights(X[:, 0])
+
+    regressor = PowerDurationRegressor(model=model, **params)
+    return regressor.fit(X, y, sample_weight=sample_weight)
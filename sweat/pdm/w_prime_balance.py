@@ -1,8 +1,18 @@
 import math
+from collections import namedtuple
 
 import numpy as np
 import pandas as pd
 
+from ..utils import linear_recurrence
+
+SKIBA_BLOCK_SIZE = 2 ** 22
+W_PRIME_BALANCE_GRID_BLOCK_SIZE = 2 ** 22
+
+WPrimeBalanceSummary = namedtuple(
+    "WPrimeBalanceSummary", ["minimum", "time_below_zero"]
+)
+
 
 def tau_w_prime_balance(power, cp, untill=None):
     if untill is None:
@@ -16,9 +26,101 @@ def tau_w_prime_balance(power, cp, untill=None):
     return 546 * math.e ** (-0.01 * delta_cp) + 316
 
 
+def tau_w_prime_balance_dynamic(power, cp, dt=None):
+    """Dynamic tau for every sample of power
+
+    Equal to [tau_w_prime_balance(power, cp, t) for t in range(len(power))], but computed in a
+    single pass from the running sum and count of the samples below cp. When dt is passed the
+    average power below cp is weighted by the durations of the samples.
+    """
+    values = np.asarray(power, dtype=float)
+    below_cp = values < cp
+    weights = _sample_durations(values, dt) * below_cp
+
+    # tau of sample t only uses the samples before t
+    count = np.concatenate([[0], np.cumsum(weights)[:-1]])
+    total = np.concatenate(
+        [[0.0], np.cumsum(np.where(below_cp, values, 0.0) * weights)[:-1]]
+    )
+
+    avg_power_below_cp = np.divide(
+        total, count, out=np.zeros(len(values)), where=count > 0
+    )
+    delta_cp = cp - avg_power_below_cp
+
+    return 546 * np.exp(-0.01 * delta_cp) + 316
+
+
+def _tau_w_prime_balance_static(power, cp, dt=None):
+    """Static tau (see tau_w_prime_balance()) for every value of the cp array"""
+    weights = _sample_durations(power, dt) * np.ones(len(power))
+    order = np.argsort(power)[: np.count_nonzero(~np.isnan(power))]
+    values = power[order]
+    cumulative_time = np.concatenate([[0.0], np.cumsum(weights[order])])
+    cumulative_power = np.concatenate([[0.0], np.cumsum(values * weights[order])])
+
+    below_cp = np.searchsorted(values, cp, side="left")
+    count = cumulative_time[below_cp]
+    total = cumulative_power[below_cp]
+    avg_power_below_cp = np.divide(
+        total, count, out=np.zeros(np.shape(count)), where=count > 0
+    )
+    delta_cp = cp - avg_power_below_cp
+
+    return 546 * np.exp(-0.01 * delta_cp) + 316
+
+
+def sample_durations(timestamps):
+    """Durations of irregularly recorded samples
+
+    The duration of a sample is the time since the previous sample, the first sample gets the
+    duration of the second sample. The result can be passed as the dt argument of the W'
+    balance functions to skip resampling to 1 second.
+
+    Parameters
+    ----------
+    timestamps : array-like
+        Timestamps of the samples: a DatetimeIndex, a TimedeltaIndex, datetime64 or timedelta64
+        values or numbers of seconds
+
+    Returns
+    -------
+    numpy.ndarray
+        Durations in seconds
+    """
+    timestamps = np.asarray(timestamps)
+    if np.issubdtype(timestamps.dtype, np.datetime64) or np.issubdtype(
+        timestamps.dtype, np.timedelta64
+    ):
+        timestamps = (timestamps - timestamps[:1]) / np.timedelta64(1, "s")
+    timestamps = timestamps.astype(float)
+
+    if len(timestamps) < 2:
+        return np.ones(len(timestamps))
+
+    durations = np.diff(timestamps)
+    return np.concatenate([durations[:1], durations])
+
+
+def _sample_durations(power, dt):
+    """Durations of the samples of power, 1.0 when dt is None"""
+    if dt is None:
+        return 1.0
+
+    dt = np.asarray(dt)
+    if np.issubdtype(dt.dtype, np.timedelta64):
+        dt = dt / np.timedelta64(1, "s")
+    dt = dt.astype(float)
+
+    if dt.ndim > 0 and dt.shape[-1] != len(power):
+        raise ValueError("dt should have the same length as power")
+
+    return dt
+
+
 def get_tau_method(power, cp, tau_dynamic, tau_value):
     if tau_dynamic:
-        tau_dynamic = [tau_w_prime_balance(power, cp, i) for i in range(len(power))]
+        tau_dynamic = tau_w_prime_balance_dynamic(power, cp)
         tau = lambda t: tau_dynamic[t]
 
     elif tau_value is None:
@@ -31,8 +133,34 @@ def get_tau_method(power, cp, tau_dynamic, tau_value):
     return tau
 
 
+def _as_output(power, w_prime_balance):
+    """Returns a pd.Series with the index of power when power is a pd.Series"""
+    if isinstance(power, pd.Series):
+        return pd.Series(w_prime_balance, index=power.index)
+
+    return w_prime_balance
+
+
+def _w_prime_expended(values, cp, exponent, dt):
+    """W' expended by samples of dt seconds that decay by e ** -exponent
+
+    A sample of dt seconds expends as much W' as dt 1 second samples at the same power that
+    each decay by e ** (-exponent / dt): (p - cp) * (1 - e ** -exponent) /
+    (1 - e ** (-exponent / dt)), which is p - cp for dt=1 and dt * (p - cp) without decay.
+    """
+    w_prime_expended = np.fmax(values - cp, 0)
+    if dt is None:
+        return w_prime_expended
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.expm1(-exponent) / np.expm1(-exponent / dt)
+    factor = np.where(np.isfinite(factor), factor, dt)
+
+    return w_prime_expended * factor
+
+
 def w_prime_balance_waterworth(
-    power, cp, w_prime, tau_dynamic=False, tau_value=None, *args, **kwargs
+    power, cp, w_prime, tau_dynamic=False, tau_value=None, dt=None, *args, **kwargs
 ):
     """
     Optimisation of Skiba's algorithm by Dave Waterworth.
@@ -40,66 +168,482 @@ def w_prime_balance_waterworth(
     http://markliversedge.blogspot.nl/2014/10/wbal-optimisation-by-mathematician.html
     Source:
     Skiba, Philip Friere, et al. "Modeling the expenditure and reconstitution of work capacity above critical power." Medicine and science in sports and exercise 44.8 (2012): 1526-1532.
+
+    The running sum of expended W' is rescaled at every sample (running_sum[t] =
+    running_sum[t - 1] * e ** (-1 / tau) + w_prime_expended[t]), which is equal to the
+    original formulation but does not overflow on long streams.
+    dt are the durations of the samples in seconds (see sample_durations()), which defaults to
+    1 second per sample.
+    Returns a pd.Series when power is a pd.Series, otherwise a numpy.ndarray.
     """
-    sampling_rate = 1
-    running_sum = 0
-    w_prime_balance = []
-    tau = get_tau_method(power, cp, tau_dynamic, tau_value)
-
-    for t, p in enumerate(power):
-        power_above_cp = p - cp
-        w_prime_expended = max(0, power_above_cp) * sampling_rate
-        running_sum = running_sum + w_prime_expended * (
-            math.e ** (t * sampling_rate / tau(t))
-        )
+    values = np.asarray(power, dtype=float)
+    sampling_rate = _sample_durations(values, dt)
 
-        w_prime_balance.append(
-            w_prime - running_sum * math.e ** (-t * sampling_rate / tau(t))
+    if tau_dynamic:
+        # Time since the first sample
+        elapsed_time = np.cumsum(sampling_rate * np.ones(len(values)))
+        exponent = (elapsed_time - elapsed_time[:1]) / tau_w_prime_balance_dynamic(
+            values, cp, dt
         )
+        exponent = np.diff(exponent, prepend=exponent[:1])
+    else:
+        exponent = sampling_rate / _static_tau(power, values, cp, tau_value, dt)
+
+    w_prime_expended = _w_prime_expended(values, cp, exponent, dt)
+    running_sum = linear_recurrence(np.exp(-exponent), w_prime_expended)
+    w_prime_balance = w_prime - running_sum
+
+    return _as_output(power, w_prime_balance)
+
 
-    return pd.Series(w_prime_balance)
+def _static_tau(power, values, cp, tau_value, dt):
+    if tau_value is not None:
+        return tau_value
+
+    if dt is None:
+        return tau_w_prime_balance(power, cp)
+
+    return _tau_w_prime_balance_static(values, cp, dt)
 
 
 def w_prime_balance_skiba(
-    power, cp, w_prime, tau_dynamic=False, tau_value=None, *args, **kwargs
+    power, cp, w_prime, tau_dynamic=False, tau_value=None, dt=None, *args, **kwargs
 ):
     """
     Source:
     Skiba, Philip Friere, et al. "Modeling the expenditure and reconstitution of work capacity above critical power." Medicine and science in sports and exercise 44.8 (2012): 1526-1532.
+
+    With a static tau the sum of expended W' is evaluated with the recursion
+    w_prime_exp_sum[t] = w_prime_exp_sum[t - 1] * e ** (-1 / tau) + w_prime_exp[t].
+    A dynamic tau reweighs all earlier samples at every sample, so then the sum is evaluated
+    in blocks of samples, only over the samples above cp.
+    dt are the durations of the samples in seconds (see sample_durations()), which defaults to
+    1 second per sample. A sample of dt seconds expends and recovers as much W' as dt 1 second
+    samples at the same power.
+    Returns a pd.Series when power is a pd.Series, otherwise a numpy.ndarray.
     """
-    w_prime_balance = []
-    tau = get_tau_method(power, cp, tau_dynamic, tau_value)
+    values = np.asarray(power, dtype=float)
+    sampling_rate = _sample_durations(values, dt)
+
+    if not tau_dynamic:
+        exponent = sampling_rate / _static_tau(power, values, cp, tau_value, dt)
+        w_prime_exp = _w_prime_expended(values, cp, exponent, dt)
+        w_prime_exp_sum = linear_recurrence(np.exp(-exponent), w_prime_exp)
+        return _as_output(power, w_prime - w_prime_exp_sum)
+
+    w_prime_exp = np.fmax(values - cp, 0)
+    tau = tau_w_prime_balance_dynamic(values, cp, dt)
+    elapsed_time = np.cumsum(sampling_rate * np.ones(len(values)))
+    expended = np.flatnonzero(w_prime_exp > 0)
+    w_prime_exp_sum = np.zeros(len(values))
 
-    for t in range(len(power)):
-        w_prime_exp_sum = 0
+    block_size = max(1, SKIBA_BLOCK_SIZE // max(len(expended), 1))
+    for start in range(0, len(values), block_size):
+        t = np.arange(start, min(start + block_size, len(values)))
+        u = expended[: np.searchsorted(expended, t[-1], side="right")]
 
-        for u, p in enumerate(power[: t + 1]):
-            w_prime_exp = max(0, p - cp)
-            w_prime_exp_sum += w_prime_exp * np.power(np.e, (u - t) / tau(t))
+        # Samples after t contribute 0 (exponents of -inf)
+        delta = elapsed_time[u][np.newaxis, :] - elapsed_time[t][:, np.newaxis]
+        delta[u[np.newaxis, :] > t[:, np.newaxis]] = -np.inf
+        weights = np.exp(delta / tau[t, np.newaxis])
+        if dt is not None:
+            # Sample u expends W' over the 1 second samples of its duration
+            weights *= _w_prime_expended(
+                1.0,
+                0.0,
+                sampling_rate[u][np.newaxis, :] / tau[t, np.newaxis],
+                sampling_rate[u][np.newaxis, :],
+            )
+        w_prime_exp_sum[t] = weights @ w_prime_exp[u]
 
-        w_prime_balance.append(w_prime - w_prime_exp_sum)
+    return _as_output(power, w_prime - w_prime_exp_sum)
+
+
+def _froncioni_skiba_clarke_step(values, cp, w_prime, sampling_rate):
+    """Coefficients of w_prime_balance[t] = decay * w_prime_balance[t - 1] + delta
+
+    Below cp the 1 second recovery step is compounded over the duration of the sample, so W'
+    balance recovers towards w_prime without overshooting it.
+    """
+    recovery = (1 - (cp - values) / w_prime) ** sampling_rate
+    below_cp = values < cp
+    decay = np.where(below_cp, recovery, 1.0)
+    delta = np.where(below_cp, w_prime * (1 - recovery), (cp - values) * sampling_rate)
 
-    return pd.Series(w_prime_balance)
+    return decay, delta
 
 
-def w_prime_balance_froncioni_skiba_clarke(power, cp, w_prime):
+def w_prime_balance_froncioni_skiba_clarke(power, cp, w_prime, dt=None):
     """
     Source:
     Skiba, P. F., Fulford, J., Clarke, D. C., Vanhatalo, A., & Jones, A. M. (2015). Intramuscular determinants of the ability to recover work capacity above critical power. European journal of applied physiology, 115(4), 703-713.
+
+    W' balance is evaluated as the recursion
+    w_prime_balance[t] = w_prime_balance[t - 1] * (1 - (cp - p) / w_prime) + (cp - p) when
+    p < cp, and w_prime_balance[t] = w_prime_balance[t - 1] + (cp - p) otherwise.
+    dt are the durations of the samples in seconds (see sample_durations()), which defaults to
+    1 second per sample. A sample of dt seconds changes W' balance as much as dt 1 second
+    samples at the same power.
+    Returns a pd.Series when power is a pd.Series, otherwise a numpy.ndarray.
+    """
+    values = np.asarray(power, dtype=float)
+    decay, delta = _froncioni_skiba_clarke_step(
+        values, cp, w_prime, _sample_durations(values, dt)
+    )
+    w_prime_balance = linear_recurrence(decay, delta, initial=w_prime)
+
+    return _as_output(power, w_prime_balance)
+
+
+def w_prime_balance_grid(
+    power, cp, w_prime, algorithm="waterworth", tau_value=None, summary=False, dt=None
+):
+    """W' balance for a grid of parameters
+
+    Computes the W' balance of power for every combination of cp, w_prime (and tau_value),
+    for example to analyse the sensitivity of W' balance to the critical power model. The
+    parameters are broadcast against each other, so cp[:, np.newaxis] and w_prime of lengths
+    20 evaluate a 20x20 grid. The parameter combinations are processed in blocks, so with
+    summary=True only the summaries are kept in memory.
+
+    Parameters
+    ----------
+    power : array-like
+        Power samples, at a 1 second interval unless dt is given
+    cp : number or array-like
+        Critical power
+    w_prime : number or array-like
+        W'
+    algorithm : {"waterworth", "froncioni-skiba-clarke"}, optional
+        Algorithm (the default is "waterworth"), see w_prime_balance_waterworth() and
+        w_prime_balance_froncioni_skiba_clarke()
+    tau_value : number or array-like, optional
+        Tau for the "waterworth" algorithm (the default is None, which implies the static tau
+        of every cp, see tau_w_prime_balance())
+    summary : bool, optional
+        Only return the minimum W' balance and the time below zero (the default is False)
+    dt : number or array-like, optional
+        Duration of every sample in seconds (or as timedelta64) for irregularly recorded
+        power, for example sample_durations() of the timestamps. A number applies to all
+        samples. The default is None, which implies 1 second per sample. The durations are
+        also used for the static tau and the time below zero.
+
+    Returns
+    -------
+    ndarray or WPrimeBalanceSummary
+        W' balance of shape (*parameters_shape, len(power)), or when summary=True a
+        WPrimeBalanceSummary of the minimum W' balance and the time below zero in seconds,
+        both of shape parameters_shape.
     """
-    last = w_prime
-    w_prime_balance = []
+    values = np.asarray(power, dtype=float)
+    sampling_rate = _sample_durations(values, dt)
+    cp = np.asarray(cp, dtype=float)
+    w_prime = np.asarray(w_prime, dtype=float)
+
+    if algorithm == "waterworth":
+        if tau_value is None:
+            tau = _tau_w_prime_balance_static(values, cp, dt)
+        else:
+            tau = np.asarray(tau_value, dtype=float)
+        parameters = np.broadcast_arrays(cp, w_prime, tau)
+    elif algorithm == "froncioni-skiba-clarke":
+        if tau_value is not None:
+            raise ValueError(f"tau_value is not supported by the {algorithm} algorithm")
+        parameters = np.broadcast_arrays(cp, w_prime)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+
+    shape = parameters[0].shape
+    parameters = [parameter.ravel() for parameter in parameters]
+    n_rows = len(parameters[0])
+
+    if summary:
+        minimum = np.empty(n_rows)
+        time_below_zero = np.empty(n_rows)
+    else:
+        w_prime_balance = np.empty((n_rows, len(values)))
+
+    block_rows = max(1, W_PRIME_BALANCE_GRID_BLOCK_SIZE // max(len(values), 1))
+    for start in range(0, n_rows, block_rows):
+        block = slice(start, start + block_rows)
+        block_cp, block_w_prime, *block_tau = [
+            parameter[block, np.newaxis] for parameter in parameters
+        ]
 
-    for p in power:
-        if p < cp:
-            new = last + (cp - p) * (w_prime - last) / w_prime
+        if algorithm == "waterworth":
+            exponent = sampling_rate / block_tau[0]
+            w_prime_expended = _w_prime_expended(values, block_cp, exponent, dt)
+            running_sum = linear_recurrence(np.exp(-exponent), w_prime_expended)
+            balance = block_w_prime - running_sum
         else:
-            new = last + (cp - p)
+            decay, delta = _froncioni_skiba_clarke_step(
+                values, block_cp, block_w_prime, sampling_rate
+            )
+            balance = linear_recurrence(decay, delta, initial=block_w_prime[:, 0])
 
-        w_prime_balance.append(new)
-        last = new
+        if summary:
+            minimum[block] = balance.min(axis=1)
+            time_below_zero[block] = ((balance < 0) * sampling_rate).sum(axis=1)
+        else:
+            w_prime_balance[block] = balance
+
+    if summary:
+        return WPrimeBalanceSummary(
+            minimum.reshape(shape), time_below_zero.reshape(shape)
+        )
+
+    return w_prime_balance.reshape(shape + (len(values),))
+
+
+class _WPrimeBalanceTracker:
+    __slots__ = ("cp", "w_prime", "w_prime_balance", "power", "elapsed_time")
+
+    def __init__(self, cp, w_prime):
+        self.cp = cp
+        self.w_prime = w_prime
+        self.w_prime_balance = w_prime
+        self.power = None
+        self.elapsed_time = 0.0
+
+    def push(self, power, dt=1.0):
+        """Add a power sample
+
+        Parameters
+        ----------
+        power : number
+            Power of the sample
+        dt : number, optional
+            Duration of the sample in seconds (the default is 1.0)
+
+        Returns
+        -------
+        float
+            W' balance after the sample
+        """
+        self.w_prime_balance = self._update(power, dt)
+        self.power = power
+        self.elapsed_time += dt
+
+        return self.w_prime_balance
+
+    def time_to_exhaustion(self, power=None):
+        """Time until W' balance drops to zero when power is maintained
+
+        Parameters
+        ----------
+        power : number, optional
+            Power to maintain (the default is None, which implies the last pushed power)
+
+        Returns
+        -------
+        float
+            Time to exhaustion in seconds: 0 when W' balance is already depleted and inf when
+            W' balance never drops to zero at this power
+        """
+        if power is None:
+            power = self.power
+
+        if self.w_prime_balance <= 0:
+            return 0.0
+
+        if power is None or power <= self.cp:
+            return math.inf
+
+        return self._time_to_exhaustion(power)
+
+
+class _ExponentialTracker(_WPrimeBalanceTracker):
+    __slots__ = ("_running_sum",)
+
+    def __init__(self, cp, w_prime):
+        super().__init__(cp, w_prime)
+        self._running_sum = 0.0
+
+    def _decay(self, dt):
+        return math.exp(-dt / self._tau())
+
+    def _update(self, power, dt):
+        decay = self._decay(dt)
+        w_prime_expended = max(0, power - self.cp)
+        if dt != 1 and w_prime_expended > 0:
+            # As much as dt 1 second samples, see _w_prime_expended()
+            exponent = -math.log(decay)
+            if exponent != 0 and dt > 0:
+                w_prime_expended *= math.expm1(-exponent) / math.expm1(-exponent / dt)
+            else:
+                w_prime_expended *= dt
+        self._running_sum = self._running_sum * decay + w_prime_expended
+
+        return self.w_prime - self._running_sum
+
+    def _time_to_exhaustion(self, power):
+        # The running sum converges to w_prime_expended / (1 - decay) with 1 second samples
+        decay = math.exp(-1 / self._tau())
+        limit = (power - self.cp) / (1 - decay)
+        if limit <= self.w_prime:
+            return math.inf
+
+        remaining = (limit - self.w_prime) / (limit - self._running_sum)
+        return math.log(remaining) / math.log(decay)
+
+
+class WaterworthTracker(_ExponentialTracker):
+    """Real-time W' balance with Waterworth's algorithm
+
+    Updates W' balance per sample in constant time and memory, see
+    w_prime_balance_waterworth(). With tau_value=None tau is computed from the average power
+    below cp of the earlier samples, which is equal to tau_dynamic=True in
+    w_prime_balance_waterworth() (the static tau requires the complete stream). The time to
+    exhaustion keeps the current tau.
+
+    Parameters
+    ----------
+    cp : number
+        Critical power
+    w_prime : number
+        W'
+    tau_value : number, optional
+        Tau (the default is None, which implies a dynamic tau)
+    """
+
+    __slots__ = (
+        "tau_value",
+        "_time_below_cp",
+        "_energy_below_cp",
+        "_time",
+        "_exponent",
+    )
+
+    def __init__(self, cp, w_prime, tau_value=None):
+        super().__init__(cp, w_prime)
+        self.tau_value = tau_value
+        self._time_below_cp = 0.0
+        self._energy_below_cp = 0.0
+        self._time = 0.0
+        self._exponent = None
+
+    def _tau(self):
+        if self.tau_value is not None:
+            return self.tau_value
+
+        avg_power_below_cp = 0
+        if self._time_below_cp > 0:
+            avg_power_below_cp = self._energy_below_cp / self._time_below_cp
+
+        return 546 * math.e ** (-0.01 * (self.cp - avg_power_below_cp)) + 316
+
+    def _decay(self, dt):
+        if self.tau_value is not None:
+            return super()._decay(dt)
+
+        # Waterworth's algorithm with a dynamic tau weighs samples by e ** (t / tau(t))
+        # Time since the first sample
+        if self._exponent is None:
+            exponent = 0.0
+        else:
+            self._time += dt
+            exponent = self._time / self._tau()
+
+        previous_exponent = exponent if self._exponent is None else self._exponent
+        self._exponent = exponent
+
+        return math.exp(previous_exponent - exponent)
+
+    def _update(self, power, dt):
+        w_prime_balance = super()._update(power, dt)
+
+        if power < self.cp:
+            self._time_below_cp += dt
+            self._energy_below_cp += power * dt
+
+        return w_prime_balance
+
+
+class SkibaTracker(_ExponentialTracker):
+    """Real-time W' balance with Skiba's algorithm
+
+    Updates W' balance per sample in constant time and memory, see w_prime_balance_skiba().
+    Only a fixed tau is supported: the static tau requires the complete stream and a dynamic
+    tau reweighs all earlier samples at every sample.
+
+    Parameters
+    ----------
+    cp : number
+        Critical power
+    w_prime : number
+        W'
+    tau_value : number
+        Tau
+    """
+
+    __slots__ = ("tau_value",)
+
+    def __init__(self, cp, w_prime, tau_value):
+        if tau_value is None:
+            raise ValueError("SkibaTracker requires a tau_value")
+
+        super().__init__(cp, w_prime)
+        self.tau_value = tau_value
+
+    def _tau(self):
+        return self.tau_value
+
+
+class FroncioniSkibaClarkeTracker(_WPrimeBalanceTracker):
+    """Real-time W' balance with the Froncioni-Skiba-Clarke algorithm
+
+    Updates W' balance per sample in constant time and memory, see
+    w_prime_balance_froncioni_skiba_clarke().
+
+    Parameters
+    ----------
+    cp : number
+        Critical power
+    w_prime : number
+        W'
+    """
+
+    __slots__ = ()
+
+    def _update(self, power, dt):
+        last = self.w_prime_balance
+        if power < self.cp:
+            # The 1 second recovery step compounded over dt seconds
+            recovery = (1 - (self.cp - power) / self.w_prime) ** dt
+            return self.w_prime - (self.w_prime - last) * recovery
+
+        return last + (self.cp - power) * dt
+
+    def _time_to_exhaustion(self, power):
+        return self.w_prime_balance / (power - self.cp)
+
+
+def w_prime_balance_tracker(cp, w_prime, algorithm="waterworth", *args, **kwargs):
+    """Real-time W' balance tracker
+
+    Parameters
+    ----------
+    cp : number
+        Critical power
+    w_prime : number
+        W'
+    algorithm : {"waterworth", "skiba", "froncioni-skiba-clarke"}, optional
+        Algorithm (the default is "waterworth")
+
+    Returns
+    -------
+    WaterworthTracker, SkibaTracker or FroncioniSkibaClarkeTracker
+    """
+    if algorithm == "waterworth":
+        tracker = WaterworthTracker
+    elif algorithm == "skiba":
+        tracker = SkibaTracker
+    elif algorithm == "froncioni-skiba-clarke":
+        tracker = FroncioniSkibaClarkeTracker
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
 
-    return pd.Series(w_prime_balance)
+    return tracker(cp, w_prime, *args, **kwargs)
 
 
 def w_prime_balance(power, cp, w_prime, algorithm="waterworth", *args, **kwargs):
@@ -1,10 +1,13 @@
 import functools
 import inspect
+import os
 import sys
 import types
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
 
 
 CAST_TYPES = [list, pd.Series]
@@ -121,3 +124,229 @@ def enable_type_casting(module_or_func=None):
 
 def array_1d_to_2d(l):
     return np.asarray(l).reshape(-1, 1)
+
+
+# Number of samples per row of the row-wise linear recurrence
+LINEAR_RECURRENCE_ROW_SIZE = 256
+
+# Rows whose cumulative product of coefficients ends below this are not solved with
+# b / cumprod(a), which would overflow or lose precision
+_LINEAR_RECURRENCE_MIN_PRODUCT = 1e-150
+
+
+def _doubling_recurrence(a, b):
+    """Solves the recurrence from 0 along the last axis by recursive doubling
+
+    After step k every sample includes the 2 ** k samples before it, which takes
+    O(n * log(n)) operations but no divisions. The steps stop early once the coefficients
+    have decayed to 0.
+    """
+    a = np.array(a)
+    y = np.array(b)
+    n = y.shape[-1]
+    shift = 1
+    while shift < n and a[..., shift:].any():
+        y[..., shift:] += a[..., shift:] * y[..., :-shift]
+        a[..., shift:] *= a[..., :-shift]
+        shift *= 2
+
+    return y
+
+
+def _row_recurrence(a, b, initial):
+    """Solves the recurrence along the last axis in rows of LINEAR_RECURRENCE_ROW_SIZE samples
+
+    Every row is first solved from 0 at once with y = P * cumsum(b / P), where P = cumprod(a).
+    The rows are short enough for P to stay far from underflow, except after coefficients
+    close to 0, and only those rows are solved with _doubling_recurrence(). The values at the
+    ends of the rows are a short linear recurrence of the rows, also solved with
+    _doubling_recurrence(), after which the value before every row times P is added.
+    """
+    n = a.shape[-1]
+    size = LINEAR_RECURRENCE_ROW_SIZE
+    n_rows = -(-n // size)
+    head = n // size * size
+    batch_shape = a.shape[:-1]
+
+    def rows(x):
+        # (..., row, sample in row) view of x
+        return x.reshape(batch_shape + (-1, size))
+
+    def padded_rows(x, fill):
+        # (..., row, sample in row) copy of x, padded to whole rows
+        padded = np.full(batch_shape + (n_rows * size,), fill)
+        padded[..., :n] = x
+        return rows(padded)
+
+    # P and y padded to whole rows, as if a = 1 and b = 0
+    products = np.empty(batch_shape + (n_rows * size,))
+    np.cumprod(rows(a[..., :head]), axis=-1, out=rows(products[..., :head]))
+    np.cumprod(a[..., head:], axis=-1, out=products[..., head:n])
+    products[..., n:] = products[..., n - 1 : n]
+    y = np.empty(products.shape)
+    y[..., n:] = 0.0
+
+    # |P| can only be smaller before the end of a row after coefficients larger than 1
+    unstable = ~(np.abs(rows(products)[..., -1]) >= _LINEAR_RECURRENCE_MIN_PRODUCT)
+    # Unstable rows can overflow here, but are solved again below
+    errors = "ignore" if unstable.any() else None
+    with np.errstate(divide=errors, invalid=errors, over=errors):
+        np.divide(b, products[..., :n], out=y[..., :n])
+        products = rows(products)
+        y = rows(y)
+        np.cumsum(y, axis=-1, out=y)
+        y *= products
+    if unstable.any():
+        y[unstable] = _doubling_recurrence(
+            padded_rows(a, 1.0)[unstable], padded_rows(b, 0.0)[unstable]
+        )
+
+    # Value before every row
+    starts = np.broadcast_to(initial, batch_shape)[..., np.newaxis]
+    if n_rows > 1:
+        ends = y[..., -1].copy()
+        ends[..., :1] += products[..., :1, -1] * starts
+        ends = _doubling_recurrence(products[..., -1], ends)
+        starts = np.concatenate([starts, ends[..., :-1]], axis=-1)
+    products *= starts[..., np.newaxis]
+    y += products
+
+    return y.reshape(batch_shape + (-1,))[..., :n]
+
+
+def _segmented_recurrence(a, b, initial, changes, out):
+    """Solves the recurrence with lfilter per run of equal coefficients a"""
+    previous = np.broadcast_to(initial, out.shape[:-1])
+    for start, stop in zip([0, *changes], [*changes, out.shape[-1]]):
+        coefficient = a[start]
+        out[..., start:stop], _ = lfilter(
+            [1.0],
+            [1.0, -coefficient],
+            b[..., start:stop],
+            axis=-1,
+            zi=(coefficient * previous)[..., np.newaxis],
+        )
+        previous = out[..., stop - 1]
+
+    return out
+
+
+def linear_recurrence(a, b, initial=0.0):
+    """Linear recurrence
+    Solves y[t] = a[t] * y[t - 1] + b[t] along the last axis, with y[-1] = initial.
+    A scalar *a* is solved with scipy.signal.lfilter. A 1-dimensional *a* that changes value
+    only a few times is solved with lfilter per run of equal coefficients, carrying the state
+    between the runs. Otherwise the recurrence is solved with cumulative products and sums in
+    short rows, see _row_recurrence(). All methods take O(n) operations.
+
+    Parameters
+    ----------
+    a : number or array-like
+        Coefficients, broadcastable with *b*
+    b : array-like
+        Inputs
+    initial : number or array-like, optional
+        Value before the first sample, broadcastable with b[..., 0]. Defaults to 0.0.
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    b = np.asarray(b, dtype=float)
+    a = np.asarray(a, dtype=float)
+    initial = np.asarray(initial, dtype=float)
+
+    if a.ndim == 0:
+        zi = (a * initial)[..., np.newaxis] * np.ones(b.shape[:-1] + (1,))
+        y, _ = lfilter([1.0], [1.0, -a], b, axis=-1, zi=zi)
+        return y
+
+    shape = np.broadcast(a, b).shape
+    a = np.broadcast_to(a, shape)
+    b = np.broadcast_to(b, shape)
+
+    if not any(a.strides[:-1]):
+        # The coefficients only vary along the last axis
+        coefficients = a[(0,) * (a.ndim - 1)]
+        changed = coefficients[1:] != coefficients[:-1]
+        if np.count_nonzero(changed) < np.sqrt(shape[-1]) / 2:
+            changes = np.flatnonzero(changed) + 1
+            return _segmented_recurrence(
+                coefficients, b, initial, changes, np.empty(shape)
+            )
+
+    return _row_recurrence(a, b, initial)
+
+
+def _apply_chunk(func, chunk, index):
+    records = []
+    for key, item in chunk:
+        record = dict(zip(index, key if len(index) > 1 else (key,)))
+        try:
+            record.update(func(item))
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        else:
+            record["error"] = None
+        records.append(record)
+
+    return records
+
+
+def apply_many(func, items, index, columns, n_jobs=None, chunk_size=10):
+    """Apply many
+    Applies *func* to every item and collects the returned records in a data frame. The items
+    are split in chunks that are processed in a process pool. An exception raised by *func*
+    is stored in the "error" column of the item, so one failing item does not abort the others.
+
+    Parameters
+    ----------
+    func : callable
+        Called with a single item, returns a dict with the columns of the item. It has to be
+        picklable (e.g. a module level function or a functools.partial of one) when n_jobs
+        is used.
+    items : dict or list
+        Items by key (a list is keyed by position). Keys are tuples when *index* has
+        multiple names.
+    index : str or list of str
+        Name(s) of the index of the result
+    columns : list of str
+        Columns of the result. Columns that *func* does not return for an item are nan.
+    n_jobs : int, optional
+        Number of processes. Defaults to None, which processes the items in the current
+        process. -1 uses all CPUs.
+    chunk_size : int, optional
+        Number of items per task. Defaults to 10.
+
+    Returns
+    -------
+    pd.DataFrame
+        Data frame indexed by key with *columns* and an "error" column
+    """
+    if not isinstance(items, dict):
+        items = dict(enumerate(items))
+    if isinstance(index, str):
+        index = [index]
+
+    items = list(items.items())
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+
+    if n_jobs is None or n_jobs == 1 or len(chunks) <= 1:
+        results = [_apply_chunk(func, chunk, index) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(
+                executor.map(
+                    _apply_chunk, [func] * len(chunks), chunks, [index] * len(chunks),
+                )
+            )
+
+    data = pd.DataFrame(
+        [record for records in results for record in records],
+        columns=index + list(columns) + ["error"],
+    )
+
+    return data.set_index(index if len(index) > 1 else index[0])
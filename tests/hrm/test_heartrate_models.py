@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+import pytest
 
 from sweat.hrm import heartrate_models
 
@@ -16,3 +18,143 @@ def test_heartrate_model():
     assert model.params["tau_fall"].value == 22.975975612579408
     assert model.params["hr_drift"].value == 6.7232899323328612 * 10 ** -5
     assert len(predictions) == 50
+
+
+def test_heartrate_model_predict():
+    power = pd.Series(np.random.default_rng(42).normal(200, 50, 1000))
+    params = dict(
+        hr_rest=60, hr_max=190, dhr=0.3, tau_rise=24, tau_fall=30, hr_drift=3e-5
+    )
+
+    predictions = heartrate_models._heartrate_model_predict(params, power)
+
+    drifting_power = power + power.cumsum() * params["hr_drift"]
+    hr_ss = np.minimum(
+        params["hr_max"], drifting_power * params["dhr"] + params["hr_rest"]
+    )
+    expected = []
+    hr_previous = params["hr_rest"]
+    for i, h in enumerate(hr_ss):
+        rising = i > 0 and drifting_power[i] > drifting_power[i - 1]
+        tau = params["tau_rise"] if rising else params["tau_fall"]
+        hr_previous = hr_previous + (h - hr_previous) / tau
+        expected.append(hr_previous)
+
+    assert isinstance(predictions, np.ndarray)
+    assert predictions == pytest.approx(expected)
+
+
+def test_heartrate_model_predict_long():
+    # On noisy 1 Hz power and ndarray input, the prediction took 0.15 ms instead of 2.9 ms for
+    # the loop over 7200 samples (about 20x) and 0.85 ms instead of 14 ms over 36000 samples
+    # (about 16x).
+    power = np.clip(np.random.default_rng(42).normal(200, 60, 36000), 0, None)
+    params = dict(
+        hr_rest=60, hr_max=190, dhr=0.3, tau_rise=24, tau_fall=30, hr_drift=3e-5
+    )
+
+    predictions = heartrate_models._heartrate_model_predict(params, power)
+
+    drifting_power = power + power.cumsum() * params["hr_drift"]
+    hr_ss = np.minimum(
+        params["hr_max"], drifting_power * params["dhr"] + params["hr_rest"]
+    )
+    expected = []
+    hr_previous = params["hr_rest"]
+    for i, h in enumerate(hr_ss):
+        rising = i > 0 and drifting_power[i] > drifting_power[i - 1]
+        tau = params["tau_rise"] if rising else params["tau_fall"]
+        hr_previous = hr_previous + (h - hr_previous) / tau
+        expected.append(hr_previous)
+
+    assert predictions == pytest.approx(expected)
+
+
+def simulated_activities(number, length=1800):
+    rng = np.random.default_rng(42)
+    activities = {}
+    for i in range(number):
+        power = np.clip(np.cumsum(rng.normal(0, 10, length)) + 200, 0, None)
+        params = dict(
+            hr_rest=60,
+            hr_max=190,
+            dhr=0.3 + 0.01 * i,
+            tau_rise=24,
+            tau_fall=30,
+            hr_drift=1e-5 * i,
+        )
+        heartrate = heartrate_models._heartrate_model_predict(params, power)
+        activities[f"activity_{i}"] = (heartrate + rng.normal(0, 1, length), power)
+
+    return activities
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_heartrate_model_many(n_jobs):
+    activities = simulated_activities(3, length=600)
+    activities["missing"] = (pd.Series([np.nan] * 10), pd.Series(range(10)))
+
+    result = heartrate_models.heartrate_model_many(
+        activities, n_jobs=n_jobs, chunk_size=2
+    )
+
+    assert list(result.index) == list(activities)
+    for key in ["activity_0", "activity_2"]:
+        model, _ = heartrate_models.heartrate_model(*activities[key])
+        assert result.loc[key, "dhr"] == pytest.approx(model.params["dhr"].value)
+        assert result.loc[key, "nfev"] == model.nfev
+
+    assert result["error"].notna().sum() == 1
+    assert np.isnan(result.loc["missing", "hr_rest"])
+
+
+def test_heartrate_model_joint():
+    activities = simulated_activities(4)
+
+    model, parameters, predictions = heartrate_models.heartrate_model_joint(activities)
+
+    assert list(parameters.index) == list(activities)
+    assert (parameters["hr_rest"] == parameters["hr_rest"].iloc[0]).all()
+    assert parameters["hr_rest"].iloc[0] == pytest.approx(60, rel=1e-2)
+    assert parameters["tau_rise"].iloc[0] == pytest.approx(24, rel=5e-2)
+    assert parameters["dhr"].values == pytest.approx([0.30, 0.31, 0.32, 0.33], rel=1e-2)
+    assert np.diff(parameters["hr_drift"]).min() > 0
+    assert len(predictions) == 4
+    assert len(predictions[0]) == 1800
+
+
+def test_heartrate_predictor():
+    power = np.random.default_rng(42).normal(200, 50, 1000)
+    power[100] = np.nan
+    params = dict(
+        hr_rest=60, hr_max=190, dhr=0.3, tau_rise=24, tau_fall=30, hr_drift=3e-5
+    )
+    expected = heartrate_models._heartrate_model_predict(params, power)
+
+    predictor = heartrate_models.HeartRatePredictor(params)
+    live = [predictor.push(p) for p in power]
+
+    assert live[:100] == pytest.approx(expected[:100])
+    assert np.isnan(live[100:]).all()
+    assert predictor.n_samples == 1000
+    assert np.isnan(predictor.mean_residual)
+
+
+def test_heartrate_predictor_residuals():
+    activities = simulated_activities(1, length=600)
+    heartrate, power = activities["activity_0"]
+    model, predictions = heartrate_models.heartrate_model(heartrate, power)
+
+    predictor = heartrate_models.HeartRatePredictor(model.params, span=60)
+    live = [predictor.push(p, hr + 10) for p, hr in zip(power, heartrate)]
+
+    residuals = heartrate + 10 - predictions
+    assert live == pytest.approx(list(predictions))
+    assert predictor.residual == pytest.approx(residuals[-1])
+    assert predictor.mean_residual == pytest.approx(residuals.mean())
+    assert predictor.ewm_residual == pytest.approx(
+        pd.Series(residuals).ewm(span=60, adjust=False).mean().iloc[-1]
+    )
+
+    with pytest.raises(AttributeError):
+        predictor.unknown = 1
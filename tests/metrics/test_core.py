@@ -3,16 +3,23 @@ import numpy as np
 import pandas as pd
 from unittest import mock
 from sweat.metrics.core import (
+    POWER_ZONES_THRESHOLD,
     mask_fill,
     rolling_mean,
     median_filter,
     compute_zones,
     best_interval,
+    best_intervals,
     time_in_zones,
+    zone_counts,
     weighted_average_power,
+    wap_and_xpower,
     mean_max,
+    log_spaced_durations,
     multiple_best_intervals,
     DataPoint,
+    Interval,
+    top_intervals,
 )
 
 
@@ -86,6 +93,33 @@ class TestMedianFilter:
 
         assert (rv == expected).all()
 
+    def test_median_filter_out(self):
+        stream = np.ones(60)
+        stream[-1] = 2
+
+        rv = median_filter(stream, out=stream)
+
+        assert rv is stream
+        assert (stream == np.ones(60)).all()
+
+    @pytest.mark.parametrize("window", [1, 4, 31])
+    def test_median_filter_pandas(self, window):
+        stream = np.random.default_rng(42).normal(250, 50, 500)
+        stream[::50] = 1000
+        stream[7] = np.nan
+
+        for y in [stream, np.nan_to_num(stream)]:
+            rolling_median = pd.Series(y).rolling(window, min_periods=1).median()
+            difference = np.abs(y - rolling_median)
+            median_abs_deviation = difference.rolling(window, min_periods=1).median()
+            outliers = difference > 1.4826 * median_abs_deviation
+            expected = np.where(outliers, rolling_median, y)
+
+            rv = median_filter(y, window=window)
+
+            assert rv is not y
+            np.testing.assert_array_equal(rv, expected)
+
 
 class TestComputeZones:
     def test_zones_power_ftp(self):
@@ -136,17 +170,83 @@ class TestBestInterval:
         assert best_interval(stream, 5) == 1
 
 
+class TestBestIntervals:
+    def test_best_intervals(self):
+        power = np.random.default_rng(42).normal(250, 50, 1000)
+        windows = [1, 5, 30, 60, 600, 1000, 2000]
+
+        rv = best_intervals(power, windows)
+
+        assert len(rv) == len(windows)
+        for window, interval in zip(windows, rv):
+            assert interval == pytest.approx(best_interval(power.copy(), window))
+
+    def test_best_intervals_with_mask(self):
+        stream = np.asarray([1, 2, 3, 4, 5], dtype=float)
+        mask = np.asarray([True, True, False, True, True], dtype=bool)
+
+        rv = best_intervals(stream, [1, 2, 10], mask=mask)
+
+        assert (rv == [5.0, 4.5, 2.4]).all()
+
+    def test_best_intervals_missing_values(self):
+        stream = np.asarray([1, 2, np.nan, 4, 5])
+
+        rv = best_intervals(stream, [1, 3])
+
+        assert (rv == [5.0, 4.5]).all()
+
+
 class TestTimeInZones:
-    @mock.patch("sweat.metrics.core.compute_zones")
-    def test_time_in_zones(self, zones):
+    def test_time_in_zones(self):
         power = [0.55, 0.75, 0.9, 1.05, 1.2, 1.5, 10.0]
-        zones.return_value = [1, 2, 3, 4, 5, 6, 7]
 
         rv = time_in_zones(power, ftp=1.0)
         expected = np.asarray([1, 1, 1, 1, 1, 1, 1])
 
         assert (rv == expected).all()
 
+    def test_time_in_zones_empty_zones(self):
+        power = [100, 110, 280]
+
+        rv = time_in_zones(power, ftp=200)
+
+        assert (rv == [2, 0, 0, 0, 0, 1, 0]).all()
+
+
+class TestZoneCounts:
+    def test_zone_counts(self):
+        stream = np.asarray([0, 1, 150, 210, 250, 300, 350, 450, np.nan, 20000])
+        edges = [-1, 144, 196, 235, 274, 313, 391, 10000]
+
+        rv = zone_counts(stream, edges)
+        expected = pd.Series(pd.cut(stream, edges)).value_counts(sort=False).values
+
+        assert (rv == [2, 1, 1, 1, 1, 1, 1]).all()
+        assert (rv == expected).all()
+
+    def test_zone_counts_right_closed(self):
+        rv = zone_counts([0, 1, 2, 3], [0, 1, 2])
+
+        assert (rv == [1, 1]).all()
+
+    def test_zone_counts_multiple_systems(self):
+        stream = np.random.default_rng(42).normal(250, 80, 1000)
+        edges = np.outer([200, 250, 300], POWER_ZONES_THRESHOLD)
+
+        rv = zone_counts(stream, edges)
+
+        assert rv.shape == (3, 7)
+        for counts, ftp in zip(rv, [200, 250, 300]):
+            assert (counts == time_in_zones(stream, ftp=ftp)).all()
+
+    def test_zone_counts_invalid_edges(self):
+        with pytest.raises(ValueError):
+            zone_counts([1, 2, 3], [0, 2, 1])
+
+        with pytest.raises(ValueError):
+            zone_counts([1, 2, 3], [0])
+
 
 class TestWeightedAveragePower:
     def test_wap(self):
@@ -159,7 +259,72 @@ class TestWeightedAveragePower:
         stream = np.ones(30)
         moving = np.ones(30, dtype=bool)
 
-        assert weighted_average_power(stream, moving, algorithm="xPower") == 1
+        weighted = 1 - (25 / 26) ** np.arange(1, 31)
+        expected = np.mean(weighted ** 4) ** (1 / 4)
+
+        assert weighted_average_power(
+            stream, moving, algorithm="xPower"
+        ) == pytest.approx(expected)
+
+    def test_wap_reference(self):
+        stream = np.random.default_rng(42).normal(250, 80, 3600)
+        expected = np.mean(pd.Series(stream).rolling(30, min_periods=1).mean() ** 4)
+
+        assert weighted_average_power(stream) == pytest.approx(expected ** (1 / 4))
+
+    def test_xpower_reference(self):
+        stream = np.random.default_rng(42).normal(250, 80, 3600)
+
+        # XPower.cpp of GoldenCheetah for 1 second samples
+        attenuation = 25 / 26
+        sample_weight = 1 / 26
+        weighted = 0.0
+        total = 0.0
+        for watts in stream:
+            weighted *= attenuation
+            weighted += sample_weight * watts
+            total += weighted ** 4
+        expected = (total / len(stream)) ** 0.25
+
+        rv = weighted_average_power(stream, algorithm="xPower")
+
+        assert rv == pytest.approx(expected)
+        assert rv != weighted_average_power(stream)
+
+    def test_xpower_missing_values(self):
+        stream = np.random.default_rng(42).normal(250, 80, 3600)
+        stream[[0, 100]] = np.nan
+
+        rv = weighted_average_power(stream, algorithm="xPower")
+
+        weighted = pd.Series(np.insert(stream, 0, 0.0)).ewm(
+            alpha=1 / 26, adjust=False, ignore_na=True
+        )
+        expected = np.mean(weighted.mean().values[1:] ** 4) ** (1 / 4)
+        assert rv == pytest.approx(expected)
+
+    def test_missing_values(self):
+        stream = np.random.default_rng(42).normal(250, 80, 3600)
+        stream[100] = np.nan
+        expected = np.mean(pd.Series(stream).rolling(30, min_periods=1).mean() ** 4)
+
+        assert weighted_average_power(stream) == pytest.approx(expected ** (1 / 4))
+
+    def test_invalid_algorithm(self):
+        with pytest.raises(ValueError):
+            weighted_average_power(np.ones(30), algorithm="NP")
+
+    def test_wap_and_xpower(self):
+        stream = np.random.default_rng(42).normal(250, 80, 3600)
+        mask = np.ones(3600, dtype=bool)
+        mask[:60] = False
+
+        wap, xpower = wap_and_xpower(stream.copy(), mask=mask)
+
+        assert wap == weighted_average_power(stream.copy(), mask=mask)
+        assert xpower == weighted_average_power(
+            stream.copy(), mask=mask, algorithm="xPower"
+        )
 
 
 class TestMeanMax:
@@ -186,6 +351,93 @@ class TestMeanMax:
         s = pd.Series(rv)
         assert s.sort_index(ascending=False).is_monotonic
 
+    def test_mean_max_blocks(self, monkeypatch):
+        power = np.random.default_rng(42).normal(250, 50, 500)
+        expected = mean_max(power)
+
+        monkeypatch.setattr("sweat.metrics.core.MEAN_MAX_BLOCK_SIZE", 1000)
+        rv = mean_max(power)
+
+        assert len(rv) == 499
+        assert (rv == expected).all()
+        assert rv[9] == pytest.approx(pd.Series(power).rolling(10).mean()[10:].max())
+
+    def test_mean_max_missing_values(self):
+        power = pd.Series([100.0, 200.0, np.nan, 300.0, 100.0])
+        rv = mean_max(power)
+
+        assert (rv == [200.0, 150.0, 500 / 3, 150.0]).all()
+
+    def test_mean_max_durations(self):
+        power = np.random.default_rng(42).normal(250, 50, 500)
+        curve = mean_max(power)
+
+        rv = mean_max(power, durations=[60, 1, 5, 499, 500, 3600])
+
+        assert (rv[:4] == curve[[59, 0, 4, 498]]).all()
+        assert np.isnan(rv[4:]).all()
+
+    def test_mean_max_durations_monotonic(self):
+        power = pd.Series([100] * 120 + ([300] * 60 + [100] * 60) * 4 + [100] * 60)
+        durations = [1, 60, 120, 180, 240]
+
+        rv = mean_max(power, durations=durations)
+        assert not (np.diff(rv) <= 0).all()
+
+        rv = mean_max(power, durations=durations, monotonic=True)
+        assert rv[0] == 300
+        assert (np.diff(rv) <= 0).all()
+
+    def test_mean_max_durations_invalid(self):
+        with pytest.raises(ValueError):
+            mean_max(np.ones(10), durations=[0, 1])
+
+        with pytest.raises(ValueError):
+            mean_max(np.ones(10), durations=[1.5])
+
+    def test_mean_max_return_index(self):
+        power = np.random.default_rng(42).normal(250, 50, 500)
+        power[100:160] = 400
+
+        rv, index = mean_max(power, return_index=True)
+
+        assert (rv == mean_max(power)).all()
+        assert index[59] == 100
+        for duration in [1, 10, 60, 300, 499]:
+            start = index[duration - 1]
+            assert power[start : start + duration].mean() == pytest.approx(
+                rv[duration - 1]
+            )
+
+    def test_mean_max_return_index_monotonic(self):
+        power = np.asarray([100.0, 100.0, 500.0, 100.0, 400.0, 400.0])
+
+        rv, index = mean_max(power, monotonic=True, return_index=True)
+
+        assert (rv == [500.0, 400.0, 350.0, 350.0, 300.0]).all()
+        assert (index == [2, 4, 2, 2, 1]).all()
+
+    def test_mean_max_return_index_durations(self):
+        power = np.asarray([100.0, 100.0, 500.0, 100.0, 400.0, 400.0])
+
+        rv, index = mean_max(power, durations=[2, 10, 1], return_index=True)
+
+        assert np.isnan(rv[1])
+        assert (index == [4, -1, 2]).all()
+
+    def test_log_spaced_durations(self):
+        rv = log_spaced_durations()
+
+        assert rv[0] == 1
+        assert rv[-1] == 36000
+        assert len(rv) <= 100
+        assert (np.diff(rv) > 0).all()
+
+    def test_mean_max_short_stream(self):
+        assert len(mean_max(np.asarray([]))) == 0
+        assert len(mean_max(np.asarray([100]))) == 0
+        assert len(mean_max(np.asarray([100], dtype=float), monotonic=True)) == 0
+
 
 class TestMultipleBestIntervals:
     def test_mean_max_bests(self, power):
@@ -198,6 +450,50 @@ class TestMultipleBestIntervals:
         assert bests[2].value == 90.0
 
 
+class TestTopIntervals:
+    def test_top_intervals(self, power):
+        rv = top_intervals(power, [3, 10, 200], 3)
+
+        assert len(rv) == 3
+        assert rv[0] == [
+            Interval(97, 100, 98.0),
+            Interval(94, 97, 95.0),
+            Interval(91, 94, 92.0),
+        ]
+        assert [i.start for i in rv[1]] == [90, 80, 70]
+        assert rv[1][0].value == pytest.approx(power[90:100].mean())
+        assert rv[2] == []
+
+    def test_top_intervals_non_overlapping(self):
+        power = np.random.default_rng(42).normal(250, 50, 1000)
+
+        for duration, intervals in zip([5, 60], top_intervals(power, [5, 60], 10)):
+            assert len(intervals) == 10
+            assert all(i.stop - i.start == duration for i in intervals)
+            assert [i.value for i in intervals] == sorted(
+                [i.value for i in intervals], reverse=True
+            )
+
+            starts = sorted(i.start for i in intervals)
+            assert (np.diff(starts) >= duration).all()
+
+    def test_top_intervals_no_room(self):
+        rv = top_intervals(np.ones(10), [4], 5)
+
+        assert len(rv[0]) == 2
+
+    def test_top_intervals_missing_values(self):
+        power = [100, 100, 100, 100, 100, np.nan, 500, 500, 500, 100, 100, 100]
+
+        rv = top_intervals(power, [3], 2)
+
+        assert rv[0] == [Interval(6, 9, 500.0), Interval(0, 3, 100.0)]
+
+        rv = top_intervals([100, 100, np.nan, 100, 100, 100, 100, 100], [5], 2)
+
+        assert rv[0] == [Interval(3, 8, 100.0)]
+
+
 class TestDataPoint:
     def test_init(self):
         p = DataPoint(1, 2)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sweat.metrics.core import mean_max
+from sweat.metrics.mean_max import MeanMaxAccumulator, SeasonCurve
+
+
+class TestSeasonCurve:
+    def test_update(self):
+        season_curve = SeasonCurve()
+
+        assert season_curve.update([300.0, 200.0], "2021-01-01", "a")
+        assert season_curve.update([250.0, 220.0, 210.0], "2021-01-02", "b")
+        assert not season_curve.update([100.0], "2021-01-03", "c")
+
+        assert len(season_curve) == 3
+        assert (season_curve.values == [300.0, 220.0, 210.0]).all()
+        assert list(season_curve.activities) == ["a", "b", "b"]
+        assert season_curve.dates[0] == np.datetime64("2021-01-01")
+
+    def test_update_series(self):
+        season_curve = SeasonCurve(durations=[1, 60, 300])
+        curve = pd.Series(
+            [500.0, 300.0, 250.0], index=pd.to_timedelta([1, 5, 60], unit="s")
+        )
+
+        season_curve.update(curve, "2021-01-01", 1)
+
+        assert season_curve.values[:2].tolist() == [500.0, 250.0]
+        assert np.isnan(season_curve.values[2])
+
+    def test_to_frame(self):
+        power = np.random.default_rng(42).normal(250, 50, 100)
+        season_curve = SeasonCurve()
+        season_curve.update(mean_max(power), "2021-01-01", "a")
+
+        frame = season_curve.to_frame()
+
+        assert isinstance(frame.index, pd.TimedeltaIndex)
+        assert list(frame.columns) == ["mean_max", "date", "activity"]
+        assert (frame["mean_max"].values == mean_max(power)).all()
+
+    def test_window(self):
+        season_curve = SeasonCurve(window=7)
+        season_curve.update([400.0, 300.0, 200.0], "2021-01-01", "a")
+        season_curve.update([350.0, 320.0, 150.0], "2021-01-03", "b")
+        season_curve.update([300.0, 250.0, 180.0], "2021-01-05", "c")
+
+        assert (season_curve.values == [400.0, 320.0, 200.0]).all()
+
+        assert not season_curve.expire("2021-01-07")
+        assert season_curve.expire("2021-01-08")
+        assert (season_curve.values == [350.0, 320.0, 180.0]).all()
+        assert list(season_curve.activities) == ["b", "b", "c"]
+
+        assert season_curve.expire("2021-01-10")
+        assert (season_curve.values == [300.0, 250.0, 180.0]).all()
+
+        assert season_curve.expire("2021-01-20")
+        assert np.isnan(season_curve.values).all()
+
+    def test_window_matches_recompute(self):
+        rng = np.random.default_rng(42)
+        curves = [np.sort(rng.normal(300, 50, 20))[::-1] for i in range(30)]
+        dates = pd.date_range("2021-01-01", periods=30, freq="2D")
+
+        season_curve = SeasonCurve(window=10)
+        for i, (curve, date) in enumerate(zip(curves, dates)):
+            season_curve.update(curve, date, i)
+            season_curve.expire(date)
+
+            in_window = [
+                j for j in range(i + 1) if dates[j] > date - pd.Timedelta(10, "D")
+            ]
+            expected = np.max([curves[j] for j in in_window], axis=0)
+            assert (season_curve.values == expected).all()
+
+        # Dominated values are dropped, so only a few candidate curves are kept
+        assert len(season_curve._curves) <= 5
+
+    def test_expire_without_window(self):
+        with pytest.raises(ValueError):
+            SeasonCurve().expire("2021-01-01")
+
+    def test_save_load(self, tmp_path):
+        season_curve = SeasonCurve(window=7)
+        season_curve.update([400.0, 300.0, 200.0], "2021-01-01", "a")
+        season_curve.update([350.0, 320.0, 150.0], "2021-01-03", "b")
+
+        path = tmp_path / "season_curve.npz"
+        season_curve.save(path)
+        loaded = SeasonCurve.load(path)
+
+        assert loaded.window == 7
+        assert loaded.durations is None
+        assert (loaded.values == season_curve.values).all()
+        assert (loaded.dates == season_curve.dates).all()
+        assert list(loaded.activities) == ["a", "b", "a"]
+
+        loaded.expire("2021-01-08")
+        assert (loaded.values == [350.0, 320.0, 150.0]).all()
+
+
+class TestMeanMaxAccumulator:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 100, 1000])
+    def test_chunks(self, chunk_size):
+        power = np.random.default_rng(42).normal(250, 50, 600)
+        power[[10, 250, 251]] = np.nan
+        expected, expected_index = mean_max(power, return_index=True)
+
+        accumulator = MeanMaxAccumulator(max_duration=300)
+        for i in range(0, len(power), chunk_size):
+            accumulator.update(power[i : i + chunk_size])
+
+        rv, index = accumulator.curve(return_index=True)
+
+        assert accumulator.n_samples == 600
+        assert len(rv) == 300
+        assert (rv == expected[:300]).all()
+        assert (index == expected_index[:300]).all()
+        assert len(accumulator._energy) == 300
+
+    def test_monotonic(self):
+        power = pd.Series([100] * 120 + ([300] * 60 + [100] * 60) * 4 + [100] * 60)
+        accumulator = MeanMaxAccumulator(max_duration=1000)
+        accumulator.update(power[:200])
+        accumulator.update(power[200:])
+
+        assert (
+            accumulator.curve(monotonic=True) == mean_max(power, monotonic=True)
+        ).all()
+
+    def test_short_stream(self):
+        accumulator = MeanMaxAccumulator(max_duration=60)
+        assert len(accumulator.curve()) == 0
+
+        accumulator.update(100)
+        assert len(accumulator.curve()) == 0
+
+        accumulator.update([200, 300])
+        assert (accumulator.curve() == [300, 250]).all()
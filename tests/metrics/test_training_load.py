@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sweat.metrics import training_load
+from sweat.metrics.training_load import TrainingLoad
+
+
+def expected_load(daily_stress, days):
+    decay = np.exp(-1 / days)
+    load = []
+    previous = 0.0
+    for stress in daily_stress:
+        previous = previous * decay + stress * (1 - decay)
+        load.append(previous)
+
+    return np.array(load)
+
+
+class TestTrainingLoad:
+    def test_update(self):
+        training_load = TrainingLoad()
+        training_load.update(
+            ["a", "b", "a", "a"],
+            ["2021-01-01", "2021-01-02", "2021-01-03 10:00", "2021-01-03 18:00"],
+            [100, 50, 60, 40],
+        )
+
+        assert list(training_load.athletes) == ["a", "b"]
+        assert list(training_load.dates) == list(
+            pd.date_range("2021-01-01", "2021-01-03")
+        )
+        assert training_load.stress.tolist() == [[100, 0, 100], [0, 50, 0]]
+
+        daily_stress = [100, 0, 100]
+        assert training_load.ctl[0] == pytest.approx(expected_load(daily_stress, 42))
+        assert training_load.atl[0] == pytest.approx(expected_load(daily_stress, 7))
+        assert training_load.tsb[0, 0] == 0
+        assert training_load.tsb[0, 2] == pytest.approx(
+            training_load.ctl[0, 1] - training_load.atl[0, 1]
+        )
+
+    def test_incremental(self):
+        rng = np.random.default_rng(42)
+        athletes = rng.integers(0, 5, 200)
+        dates = pd.Timestamp("2021-01-01") + pd.to_timedelta(
+            np.sort(rng.integers(0, 100, 200)), unit="D"
+        )
+        stress = rng.uniform(20, 200, 200)
+
+        batch = TrainingLoad()
+        batch.update(athletes, dates, stress)
+
+        incremental = TrainingLoad()
+        for i in range(0, 200, 7):
+            incremental.update(athletes[i : i + 7], dates[i : i + 7], stress[i : i + 7])
+
+        order = incremental.athletes.get_indexer(batch.athletes)
+        assert incremental.ctl[order] == pytest.approx(batch.ctl)
+        assert incremental.atl[order] == pytest.approx(batch.atl)
+        assert incremental.tsb[order] == pytest.approx(batch.tsb)
+
+    def test_backfill(self):
+        training_load = TrainingLoad()
+        training_load.update("a", ["2021-01-01", "2021-01-05"], [100, 100])
+        training_load.update("a", "2021-01-03", 50)
+
+        daily_stress = [100, 0, 50, 0, 100]
+        assert training_load.ctl[0] == pytest.approx(expected_load(daily_stress, 42))
+
+        with pytest.raises(ValueError):
+            training_load.update("a", "2020-12-31", 50)
+
+    def test_until(self):
+        training_load = TrainingLoad(ctl_days=30, atl_days=5)
+        training_load.update("a", "2021-01-01", 100, until="2021-01-10")
+
+        assert len(training_load.dates) == 10
+        assert training_load.ctl[0] == pytest.approx(expected_load([100] + [0] * 9, 30))
+        assert training_load.atl[0] == pytest.approx(expected_load([100] + [0] * 9, 5))
+
+    def test_to_frame(self):
+        training_load = TrainingLoad()
+        training_load.update(["a", "b"], ["2021-01-01", "2021-01-02"], [100, 50])
+
+        frame = training_load.to_frame()
+
+        assert list(frame.columns) == ["stress", "ctl", "atl", "tsb"]
+        assert frame.loc[("b", "2021-01-02"), "stress"] == 50
+        assert frame.loc[("a", "2021-01-02"), "tsb"] == pytest.approx(
+            training_load.ctl[0, 0] - training_load.atl[0, 0]
+        )
+
+
+def simulated_athlete(rng, days=365, **params):
+    load = rng.uniform(0, 150, days) * (rng.uniform(size=days) > 0.3)
+    performance = training_load.banister_model_predict(params, load)
+    markers = np.full(days, np.nan)
+    tests = rng.choice(days, 40, replace=False)
+    markers[tests] = performance[tests] + rng.normal(0, 0.5, len(tests))
+
+    return load, markers
+
+
+BANISTER_PARAMS = dict(p0=250, k1=0.02, k2=0.06, tau1=40, tau2=8)
+
+
+def test_banister_model_predict():
+    load = np.random.default_rng(42).uniform(0, 150, 100)
+
+    predictions = training_load.banister_model_predict(BANISTER_PARAMS, load)
+
+    expected = []
+    for t in range(len(load)):
+        fitness = sum(load[s] * np.exp(-(t - s) / 40) for s in range(t))
+        fatigue = sum(load[s] * np.exp(-(t - s) / 8) for s in range(t))
+        expected.append(250 + 0.02 * fitness - 0.06 * fatigue)
+
+    assert predictions == pytest.approx(expected)
+
+
+def test_banister_model():
+    load, performance = simulated_athlete(np.random.default_rng(42), **BANISTER_PARAMS)
+
+    model, predictions = training_load.banister_model(load, performance)
+
+    assert model.params["tau1"].value == pytest.approx(40, rel=0.1)
+    assert model.params["tau2"].value == pytest.approx(8, rel=0.1)
+    assert len(predictions) == len(load)
+
+    dates = pd.date_range("2021-01-01", periods=len(load))
+    markers = pd.Series(performance, index=dates).dropna()
+    series_model, _ = training_load.banister_model(
+        pd.Series(load, index=dates), markers
+    )
+    assert series_model.params["tau1"].value == pytest.approx(
+        model.params["tau1"].value
+    )
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_banister_model_many(n_jobs):
+    rng = np.random.default_rng(42)
+    athletes = {
+        "a": simulated_athlete(rng, **BANISTER_PARAMS),
+        "b": simulated_athlete(rng, **{**BANISTER_PARAMS, "tau1": 30}),
+        "c": (np.ones(10), np.full(10, np.nan)),
+    }
+
+    result = training_load.banister_model_many(athletes, n_jobs=n_jobs, chunk_size=1)
+
+    assert list(result.index) == ["a", "b", "c"]
+    assert result.loc["a", "tau1"] == pytest.approx(40, rel=0.1)
+    assert result.loc["b", "tau1"] == pytest.approx(30, rel=0.2)
+    assert result.loc["b", "rmse"] < 0.5
+    assert result.loc["a", "n_samples"] == 40
+    assert result.loc["a", "error"] is None
+    assert result.loc["c", "error"] is not None
@@ -1,5 +1,7 @@
 import numpy as np
+import pandas as pd
 import pytest
+from scipy.optimize import curve_fit
 from sklearn.utils.estimator_checks import check_estimator
 
 import sweat
@@ -53,3 +55,172 @@ class TestPowerDurationRegressor:
         assert hasattr(cpreg, "p_max_")
         assert hasattr(cpreg, "w_prime_")
         assert hasattr(cpreg, "a_")
+
+    @pytest.mark.parametrize("model", ["2 param", "3 param", "exponential", "omni"])
+    def test_jacobian(self, model):
+        cpreg = sweat.PowerDurationRegressor(model=model)
+        func, jac, params = cpreg._model_selection()
+        X = np.array([[1.0], [60.0], [1200.0], [3600.0]])
+        p = np.array([330.0, 1100.0, 22000.0, 55.0][: len(params)])
+        if model != "omni":
+            p = np.array([getattr(cpreg, name) for name in params]) * 1.1
+
+        for i in range(len(p)):
+            step = np.zeros(len(p))
+            step[i] = 1e-4 * p[i]
+            expected = (func(X, *(p + step)) - func(X, *(p - step))) / (2 * step[i])
+            assert jac(X, *p)[:, i] == pytest.approx(expected, rel=1e-5, abs=1e-9)
+
+    @pytest.mark.parametrize("model", ["3 param", "exponential", "omni"])
+    def test_nfev(self, model):
+        t = np.array([1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 2400, 3600.0])
+        y = 280 + 20000 / (t + 20000 / 900) - np.where(t > 1800, 10, 0)
+
+        cpreg = sweat.PowerDurationRegressor(model=model)
+        cpreg.fit(t[:, np.newaxis], y)
+
+        func, _, params = cpreg._model_selection()
+        nfev = 0
+
+        def counted_func(*args):
+            nonlocal nfev
+            nfev += 1
+            return func(*args)
+
+        initial_params = [getattr(cpreg, name) for name in params]
+        fitted_params, _ = curve_fit(counted_func, t[:, np.newaxis], y, initial_params)
+
+        assert cpreg.nfev_ < nfev
+        for name, value in zip(params, fitted_params):
+            assert getattr(cpreg, f"{name}_") == pytest.approx(value, rel=1e-4)
+
+    def test_warm_start(self):
+        X = [[1.0], [60.0], [1200.0]]
+        cpreg = sweat.PowerDurationRegressor(model="3 param", warm_start=True)
+        cpreg.fit(X, [1500.0, 600.0, 350.0])
+        nfev = cpreg.nfev_
+
+        cpreg.fit(X, [1500.0, 600.0, 350.0])
+
+        assert cpreg.cp == 300
+        assert cpreg.nfev_ < nfev
+
+    def test_sample_weight(self):
+        X = [[1.0], [60.0], [1200.0], [3600.0]]
+        y = [1500.0, 600.0, 350.0, 300.0]
+
+        cpreg = sweat.PowerDurationRegressor(model="2 param").fit(X, y)
+        uniform = sweat.PowerDurationRegressor(model="2 param")
+        uniform.fit(X, y, sample_weight=np.full(4, 2.0))
+        weighted = sweat.PowerDurationRegressor(model="2 param")
+        weighted.fit(X, y, sample_weight=[1e-6, 1e-6, 1, 1])
+
+        assert uniform.cp_ == pytest.approx(cpreg.cp_)
+        residual = abs(cpreg.predict([[3600.0]])[0] - 300)
+        assert abs(weighted.predict([[3600.0]])[0] - 300) < residual
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_fit_many(n_jobs):
+    durations = np.arange(1, 1201)
+    curves = {
+        "a": 300 + 20000 / durations,
+        "b": pd.Series(
+            [1500.0, 600.0, 350.0], index=pd.to_timedelta([1, 60, 1200], unit="s")
+        ),
+        "c": [np.nan],
+    }
+
+    result = regressors.fit_many(
+        curves, models=["2 param", "3 param"], n_jobs=n_jobs, chunk_size=1
+    )
+
+    assert list(result.index) == [
+        (athlete, model) for athlete in "abc" for model in ["2 param", "3 param"]
+    ]
+    assert result.loc[("a", "2 param"), "cp"] == pytest.approx(300)
+    assert result.loc[("a", "2 param"), "w_prime"] == pytest.approx(20000)
+    assert result.loc[("a", "2 param"), "rmse"] == pytest.approx(0, abs=1e-6)
+    assert np.isnan(result.loc[("a", "2 param"), "p_max"])
+    assert result.loc[("b", "3 param"), "n_samples"] == 3
+
+    cpreg = sweat.PowerDurationRegressor(model="3 param")
+    cpreg.fit([[1.0], [60.0], [1200.0]], [1500.0, 600.0, 350.0])
+    assert result.loc[("b", "3 param"), "cp"] == pytest.approx(cpreg.cp_)
+
+    assert result["error"].isna().sum() == 4
+    assert result.loc[("c", "2 param"), "error"].startswith("ValueError")
+    assert np.isnan(result.loc[("c", "2 param"), "cp"])
+
+
+def test_fit_many_previous():
+    durations = np.arange(1, 1201)
+    curves = {"a": 280 + 20000 / (durations + 20000 / 900), "b": [np.nan]}
+    models = ["3 param", "exponential"]
+
+    previous = regressors.fit_many(curves, models=models)
+    result = regressors.fit_many(curves, models=models, previous=previous)
+
+    assert (result.loc["a", "nfev"] < previous.loc["a", "nfev"]).all()
+    assert result.loc["a", "cp"].values == pytest.approx(previous.loc["a", "cp"].values)
+    assert result["error"].notna().sum() == 2
+
+
+def test_fit_rolling():
+    rng = np.random.default_rng(42)
+    durations = np.arange(1, 1201)
+    dates = pd.to_datetime(["2021-01-01", "2021-01-03", "2021-01-03", "2021-01-20"])
+    curves = [
+        280 + 20000 / (durations + 20000 / 900) * rng.uniform(0.9, 1.1) for _ in dates
+    ]
+
+    result = regressors.fit_rolling(curves, dates, window=7, model="2 param")
+
+    assert len(result) == 20
+    assert list(result.columns) == ["cp", "w_prime", "refit", "error"]
+    assert result["refit"].sum() == 4
+    assert result.loc["2021-01-10", "refit"]
+    assert result.loc["2021-01-10":"2021-01-19", "error"].notna().all()
+
+    for day in ["2021-01-02", "2021-01-05", "2021-01-20"]:
+        in_window = [
+            curve
+            for curve, date in zip(curves, dates)
+            if pd.Timestamp(day) - pd.Timedelta(days=7) < date <= pd.Timestamp(day)
+        ]
+        cpreg = sweat.PowerDurationRegressor(model="2 param")
+        cpreg.fit(durations[:, np.newaxis], np.max(in_window, axis=0))
+        assert result.loc[day, "cp"] == pytest.approx(cpreg.cp_)
+        assert result.loc[day, "w_prime"] == pytest.approx(cpreg.w_prime_)
+
+
+def test_fit_mean_max():
+    durations = np.arange(1, 7201)
+    curve = 300 + 20000 / durations
+    # Values outside 2-20 minutes do not follow the 2 parameter model
+    curve[durations < 120] += 100
+    curve[durations > 1200] -= 50
+    curve[500] = np.nan
+
+    cpreg = regressors.fit_mean_max(curve)
+
+    assert cpreg.cp_ == pytest.approx(300)
+    assert cpreg.w_prime_ == pytest.approx(20000)
+
+    series = pd.Series(curve, index=pd.to_timedelta(durations, unit="s"))
+    assert regressors.fit_mean_max(series).cp_ == pytest.approx(cpreg.cp_)
+
+
+def test_fit_mean_max_duration_range():
+    durations = np.arange(1, 3601)
+    curve = 300 + 20000 / durations
+
+    cpreg = regressors.fit_mean_max(
+        curve, model="3 param", min_duration=30, max_duration=3600, number=20
+    )
+
+    assert len(regressors.log_spaced_durations(3600, 20, 30)) == 20
+    assert cpreg.cp_ == pytest.approx(300, rel=1e-3)
+
+    weighted = regressors.fit_mean_max(curve, weights=lambda t: 1 / t)
+    assert weighted.cp_ == pytest.approx(300)
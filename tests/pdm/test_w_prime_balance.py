@@ -1,3 +1,7 @@
+import math
+
+import numpy as np
+import pandas as pd
 import pytest
 
 import sweat
@@ -33,8 +37,18 @@ def test_tau_w_prime_balance_with_untill(power):
 def test_get_tau_method(power, test_input, expected):
 
     tau_method = w_prime_balance.get_tau_method(power, cp=25, **test_input)
-    assert tau_method(0) == expected[0]
-    assert tau_method(99) == expected[1]
+    assert tau_method(0) == pytest.approx(expected[0])
+    assert tau_method(99) == pytest.approx(expected[1])
+
+
+def test_tau_w_prime_balance_dynamic(power):
+    tau = w_prime_balance.tau_w_prime_balance_dynamic(power, cp=25)
+
+    expected = [
+        w_prime_balance.tau_w_prime_balance(power, cp=25, untill=i)
+        for i in range(len(power))
+    ]
+    assert tau == pytest.approx(expected)
 
 
 @pytest.mark.parametrize(
@@ -49,7 +63,7 @@ def test_w_prime_balance_waterworth(power, test_input, expected):
     w_bal = w_prime_balance.w_prime_balance_waterworth(
         power, cp=25, w_prime=2000, **test_input
     )
-    assert w_bal.iloc[75] == expected
+    assert w_bal.iloc[75] == pytest.approx(expected)
 
 
 @pytest.mark.parametrize(
@@ -64,14 +78,30 @@ def test_w_prime_balance_skiba(power, test_input, expected):
     w_bal = w_prime_balance.w_prime_balance_skiba(
         power, cp=25, w_prime=2000, **test_input
     )
-    assert w_bal.iloc[75] == expected
+    assert w_bal.iloc[75] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("tau_dynamic", [False, True])
+def test_w_prime_balance_skiba_matches_sum(tau_dynamic):
+    power = np.random.default_rng(42).normal(250, 100, 500)
+    tau = w_prime_balance.get_tau_method(power, 250, tau_dynamic, None)
+
+    w_bal = w_prime_balance.w_prime_balance_skiba(
+        power, cp=250, w_prime=20000, tau_dynamic=tau_dynamic
+    )
+
+    assert isinstance(w_bal, np.ndarray)
+    for t in [0, 1, 250, 499]:
+        u = np.arange(t + 1)
+        expected = 20000 - np.sum(np.fmax(power[u] - 250, 0) * np.exp((u - t) / tau(t)))
+        assert w_bal[t] == pytest.approx(expected)
 
 
 def test_w_prime_balance_froncioni(power):
     w_bal = w_prime_balance.w_prime_balance_froncioni_skiba_clarke(
         power, cp=25, w_prime=2000
     )
-    assert w_bal.iloc[75] == 725.0
+    assert w_bal.iloc[75] == pytest.approx(725.0)
 
 
 @pytest.mark.parametrize(
@@ -89,4 +119,319 @@ def test_w_prime_balance_froncioni(power):
 )
 def test_w_prime_balance(power, test_input, expected):
     w_bal = sweat.w_prime_balance(power, cp=25, w_prime=2000, **test_input)
-    assert w_bal.iloc[50] == expected
+    assert w_bal.iloc[50] == pytest.approx(expected)
+
+
+def test_w_prime_balance_waterworth_long_stream():
+    power = np.tile(np.repeat([400.0, 100.0], [60, 240]), 24 * 12)
+
+    w_bal = w_prime_balance.w_prime_balance_waterworth(
+        power, cp=250, w_prime=20000, tau_value=30
+    )
+
+    assert isinstance(w_bal, np.ndarray)
+    assert len(w_bal) == 24 * 3600
+    assert not np.isnan(w_bal).any()
+    assert w_bal[-1] == pytest.approx(w_bal[-301])
+
+
+def test_w_prime_balance_waterworth_series_index():
+    index = pd.date_range("2020-01-01", periods=100, freq="s")
+    power = pd.Series(range(100), index=index)
+
+    w_bal = w_prime_balance.w_prime_balance_waterworth(power, cp=25, w_prime=2000)
+
+    assert isinstance(w_bal, pd.Series)
+    assert (w_bal.index == index).all()
+
+
+@pytest.mark.parametrize(
+    "algorithm,method",
+    [
+        ("waterworth", w_prime_balance.w_prime_balance_waterworth),
+        (
+            "froncioni-skiba-clarke",
+            w_prime_balance.w_prime_balance_froncioni_skiba_clarke,
+        ),
+    ],
+)
+def test_w_prime_balance_grid(algorithm, method):
+    power = np.random.default_rng(42).normal(250, 100, 600)
+    cp = np.array([200, 250, 300])
+    w_prime = np.array([10000, 20000])
+
+    w_bal = w_prime_balance.w_prime_balance_grid(
+        power, cp[:, np.newaxis], w_prime, algorithm=algorithm
+    )
+
+    assert w_bal.shape == (3, 2, 600)
+    for i, j in [(0, 0), (1, 1), (2, 0)]:
+        expected = method(pd.Series(power), cp[i], w_prime[j])
+        assert w_bal[i, j] == pytest.approx(expected.values)
+
+
+def test_w_prime_balance_grid_tau_value():
+    power = np.random.default_rng(42).normal(250, 100, 600)
+
+    w_bal = w_prime_balance.w_prime_balance_grid(
+        power, 250, 20000, tau_value=[100, 300]
+    )
+
+    assert w_bal.shape == (2, 600)
+    expected = w_prime_balance.w_prime_balance_waterworth(
+        power, cp=250, w_prime=20000, tau_value=300
+    )
+    assert w_bal[1] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("algorithm", ["waterworth", "froncioni-skiba-clarke"])
+def test_w_prime_balance_grid_summary(algorithm):
+    power = np.random.default_rng(42).normal(300, 100, 600)
+    cp = np.linspace(200, 300, 5)[:, np.newaxis]
+    w_prime = np.linspace(5000, 25000, 4)
+
+    w_bal = w_prime_balance.w_prime_balance_grid(
+        power, cp, w_prime, algorithm=algorithm
+    )
+    summary = w_prime_balance.w_prime_balance_grid(
+        power, cp, w_prime, algorithm=algorithm, summary=True
+    )
+
+    assert summary.minimum.shape == (5, 4)
+    assert (summary.minimum == w_bal.min(axis=-1)).all()
+    assert (summary.time_below_zero == (w_bal < 0).sum(axis=-1)).all()
+    assert summary.time_below_zero.max() > 0
+
+
+def test_w_prime_balance_grid_invalid_algorithm():
+    with pytest.raises(ValueError):
+        w_prime_balance.w_prime_balance_grid([100, 200], 250, 20000, algorithm="x")
+
+    with pytest.raises(ValueError):
+        w_prime_balance.w_prime_balance_grid(
+            [100, 200], 250, 20000, algorithm="froncioni-skiba-clarke", tau_value=100
+        )
+
+
+@pytest.mark.parametrize(
+    "algorithm,tracker_kwargs,batch_kwargs",
+    [
+        ("waterworth", dict(tau_value=300), dict(tau_value=300)),
+        ("waterworth", dict(), dict(tau_dynamic=True)),
+        ("skiba", dict(tau_value=300), dict(tau_value=300)),
+        ("froncioni-skiba-clarke", dict(), dict()),
+    ],
+)
+def test_w_prime_balance_tracker(algorithm, tracker_kwargs, batch_kwargs):
+    power = np.random.default_rng(42).normal(250, 100, 600)
+    tracker = w_prime_balance.w_prime_balance_tracker(
+        250, 20000, algorithm, **tracker_kwargs
+    )
+
+    live = [tracker.push(p) for p in power]
+
+    expected = sweat.w_prime_balance(
+        pd.Series(power), 250, 20000, algorithm, **batch_kwargs
+    )
+    assert live == pytest.approx(list(expected))
+    assert tracker.w_prime_balance == live[-1]
+    assert tracker.elapsed_time == 600
+
+
+@pytest.mark.parametrize(
+    "algorithm,kwargs",
+    [
+        ("waterworth", dict(tau_value=300)),
+        ("skiba", dict(tau_value=300)),
+        ("froncioni-skiba-clarke", dict()),
+    ],
+)
+def test_w_prime_balance_tracker_time_to_exhaustion(algorithm, kwargs):
+    tracker = w_prime_balance.w_prime_balance_tracker(250, 20000, algorithm, **kwargs)
+    for p in [400] * 30 + [200] * 60:
+        tracker.push(p)
+
+    assert tracker.time_to_exhaustion() == math.inf
+    time_to_exhaustion = tracker.time_to_exhaustion(450)
+
+    seconds = 0
+    while tracker.push(450) >= 0:
+        seconds += 1
+    assert seconds == math.floor(time_to_exhaustion)
+    assert tracker.time_to_exhaustion() == 0
+
+
+def test_w_prime_balance_tracker_slots():
+    tracker = w_prime_balance.WaterworthTracker(250, 20000)
+
+    with pytest.raises(AttributeError):
+        tracker.unknown = 1
+
+
+def test_skiba_tracker_requires_tau_value():
+    with pytest.raises(ValueError):
+        w_prime_balance.SkibaTracker(250, 20000, tau_value=None)
+
+
+def test_sample_durations():
+    timestamps = pd.to_datetime(["2020-01-01 00:00:00", "2020-01-01 00:00:02"])
+    timestamps = timestamps.append(pd.to_datetime(["2020-01-01 00:00:07"]))
+
+    assert list(w_prime_balance.sample_durations(timestamps)) == [2, 2, 5]
+    assert list(w_prime_balance.sample_durations([0, 1, 3.5])) == [1, 1, 2.5]
+    assert list(w_prime_balance.sample_durations([10])) == [1]
+
+
+@pytest.mark.parametrize(
+    "method,kwargs",
+    [
+        (w_prime_balance.w_prime_balance_waterworth, dict()),
+        (w_prime_balance.w_prime_balance_waterworth, dict(tau_dynamic=True)),
+        (w_prime_balance.w_prime_balance_skiba, dict()),
+        (w_prime_balance.w_prime_balance_skiba, dict(tau_dynamic=True)),
+        (w_prime_balance.w_prime_balance_froncioni_skiba_clarke, dict()),
+    ],
+)
+def test_w_prime_balance_dt(method, kwargs):
+    power = np.random.default_rng(42).normal(250, 100, 600)
+
+    w_bal = method(power, 250, 20000, **kwargs)
+    w_bal_dt = method(power, 250, 20000, dt=np.ones(600), **kwargs)
+
+    assert w_bal_dt == pytest.approx(w_bal)
+
+
+@pytest.mark.parametrize(
+    "method,kwargs,rel",
+    [
+        (w_prime_balance.w_prime_balance_waterworth, dict(tau_value=300), 1e-9),
+        (w_prime_balance.w_prime_balance_waterworth, dict(), 1e-9),
+        # The dynamic tau of every 1 second sample only uses the samples before it
+        (w_prime_balance.w_prime_balance_waterworth, dict(tau_dynamic=True), 1e-2),
+        (w_prime_balance.w_prime_balance_skiba, dict(tau_value=300), 1e-9),
+        (w_prime_balance.w_prime_balance_skiba, dict(tau_dynamic=True), 1e-2),
+        (w_prime_balance.w_prime_balance_froncioni_skiba_clarke, dict(), 1e-9),
+    ],
+)
+def test_w_prime_balance_irregular_samples(method, kwargs, rel):
+    # Every recorded sample covers the 5 seconds since the previous sample
+    recorded = np.random.default_rng(42).normal(250, 100, 120)
+    timestamps = np.arange(0, 600, 5)
+    power = np.repeat(recorded, 5)
+
+    w_bal = method(power, 250, 20000, **kwargs)
+    w_bal_dt = method(
+        recorded, 250, 20000, dt=w_prime_balance.sample_durations(timestamps), **kwargs
+    )
+
+    assert w_bal_dt == pytest.approx(w_bal[4::5], rel=rel)
+
+
+@pytest.mark.parametrize(
+    "algorithm,kwargs",
+    [
+        ("waterworth", dict(tau_value=300)),
+        ("skiba", dict(tau_value=300)),
+        ("froncioni-skiba-clarke", dict()),
+    ],
+)
+def test_w_prime_balance_long_gap(algorithm, kwargs):
+    # An auto-paused recording: 60 seconds at 400 W, then one 0 W sample covering 120 seconds
+    power = np.concatenate([np.full(60, 400.0), [0.0]])
+    dt = np.concatenate([np.ones(60), [120]])
+
+    w_bal = sweat.w_prime_balance(
+        np.repeat(power, dt.astype(int)), 250, 20000, algorithm, **kwargs
+    )
+    w_bal_dt = sweat.w_prime_balance(power, 250, 20000, algorithm, dt=dt, **kwargs)
+
+    assert w_bal_dt[-1] == pytest.approx(w_bal[-1])
+    assert w_bal_dt[-1] < 20000
+
+
+def test_w_prime_balance_froncioni_long_gap():
+    w_bal = w_prime_balance.w_prime_balance_froncioni_skiba_clarke(
+        [400] * 60 + [0], 250, 20000, dt=[1] * 60 + [120]
+    )
+
+    assert w_bal[-1] == pytest.approx(18010, abs=1)
+
+
+def test_w_prime_balance_irregular_samples_above_cp():
+    power = [300, 400, 350]
+
+    w_bal = w_prime_balance.w_prime_balance_froncioni_skiba_clarke(
+        power, 250, 20000, dt=[1, 2, 10]
+    )
+
+    assert w_bal == pytest.approx([19950, 19650, 18650])
+
+
+def test_w_prime_balance_grid_dt():
+    power = np.random.default_rng(42).normal(250, 100, 600)
+    dt = np.random.default_rng(0).integers(1, 5, 600)
+
+    summary = w_prime_balance.w_prime_balance_grid(
+        power, [200, 250], 20000, tau_value=300, summary=True, dt=dt
+    )
+
+    w_bal = w_prime_balance.w_prime_balance_waterworth(
+        power, 200, 20000, tau_value=300, dt=dt
+    )
+    assert summary.minimum[0] == pytest.approx(w_bal.min())
+    assert summary.time_below_zero[0] == dt[w_bal < 0].sum()
+
+
+def test_w_prime_balance_grid_froncioni_dt():
+    power = np.random.default_rng(42).normal(250, 100, 600)
+    dt = np.random.default_rng(0).integers(1, 120, 600)
+
+    summary = w_prime_balance.w_prime_balance_grid(
+        power, [200, 250], 20000, "froncioni-skiba-clarke", summary=True, dt=dt
+    )
+
+    w_bal = w_prime_balance.w_prime_balance_froncioni_skiba_clarke(
+        power, 250, 20000, dt=dt
+    )
+    assert summary.minimum[1] == pytest.approx(w_bal.min())
+    assert summary.time_below_zero[1] == dt[w_bal < 0].sum()
+
+
+@pytest.mark.parametrize(
+    "algorithm,tracker_kwargs,batch_kwargs",
+    [
+        ("waterworth", dict(tau_value=300), dict(tau_value=300)),
+        ("waterworth", dict(), dict(tau_dynamic=True)),
+        ("froncioni-skiba-clarke", dict(), dict()),
+    ],
+)
+def test_w_prime_balance_tracker_dt(algorithm, tracker_kwargs, batch_kwargs):
+    power = np.random.default_rng(42).normal(250, 100, 600)
+    dt = np.random.default_rng(0).uniform(0.5, 5, 600)
+    tracker = w_prime_balance.w_prime_balance_tracker(
+        250, 20000, algorithm, **tracker_kwargs
+    )
+
+    live = [tracker.push(p, d) for p, d in zip(power, dt)]
+
+    expected = sweat.w_prime_balance(
+        power, 250, 20000, algorithm, dt=dt, **batch_kwargs
+    )
+    assert live == pytest.approx(list(expected))
+
+
+@pytest.mark.parametrize(
+    "algorithm,kwargs",
+    [("waterworth", dict(tau_value=300)), ("froncioni-skiba-clarke", dict())],
+)
+def test_w_prime_balance_tracker_long_gap(algorithm, kwargs):
+    tracker = w_prime_balance.w_prime_balance_tracker(250, 20000, algorithm, **kwargs)
+    for _ in range(60):
+        tracker.push(400)
+
+    w_bal = tracker.push(0, 120)
+
+    expected = sweat.w_prime_balance(
+        [400] * 60 + [0] * 120, 250, 20000, algorithm, **kwargs
+    )
+    assert w_bal == pytest.approx(expected[-1])
@@ -1,3 +1,5 @@
+import gc
+
 import numpy as np
 import pandas as pd
 import pytest
@@ -17,6 +19,26 @@ class TestSweatAccessor:
         assert "mean_max_power" in mean_max_data.columns
         assert len(mean_max_data) == len(data) - 1
 
+    def test_accessor_durations(self):
+        example = sweat.examples(path="4078723797.fit")
+        data = sweat.read_fit(example.path)
+        mean_max_data = data.sweat.mean_max(["power", "heartrate"], durations=[1, 60])
+
+        assert len(mean_max_data) == 2
+        assert mean_max_data.index[1] == pd.Timedelta(60, unit="seconds")
+        assert "mean_max_heartrate" in mean_max_data.columns
+
+    def test_accessor_return_index(self):
+        example = sweat.examples(path="4078723797.fit")
+        data = sweat.read_fit(example.path)
+        mean_max_data = data.sweat.mean_max("power", return_index=True)
+
+        assert "mean_max_power_start" in mean_max_data.columns
+        start = mean_max_data["mean_max_power_start"].iloc[59]
+        assert data["power"][start:].iloc[:60].mean() == pytest.approx(
+            mean_max_data["mean_max_power"].iloc[59]
+        )
+
     def test_accessor_no_datetimeindex(self):
         data = pd.DataFrame(dict(power=range(10)), index=range(10))
 
@@ -53,6 +75,29 @@ class TestSweatSeriesAccessor:
         assert mean_max.name == "mean_max_power"
         assert len(mean_max) == len(data) - 1
 
+    def test_accessor_durations(self):
+        example = sweat.examples(path="4078723797.fit")
+        data = sweat.read_fit(example.path)
+        mean_max = data["power"].sweat.mean_max()
+        sparse_mean_max = data["power"].sweat.mean_max(durations=[1, 5, 60])
+
+        assert isinstance(sparse_mean_max.index, pd.TimedeltaIndex)
+        assert list(sparse_mean_max.index.total_seconds()) == [1, 5, 60]
+        assert (sparse_mean_max == mean_max.loc[sparse_mean_max.index]).all()
+
+    def test_accessor_return_index(self):
+        example = sweat.examples(path="4078723797.fit")
+        data = sweat.read_fit(example.path)
+        mean_max = data["power"].sweat.mean_max(
+            durations=[1, 60, len(data)], return_index=True
+        )
+
+        assert isinstance(mean_max, pd.DataFrame)
+        assert list(mean_max.columns) == ["mean_max_power", "mean_max_power_start"]
+        start = mean_max["mean_max_power_start"].iloc[0]
+        assert data["power"][start] == mean_max["mean_max_power"].iloc[0]
+        assert pd.isnull(mean_max["mean_max_power_start"].iloc[-1])
+
     def test_accessor_no_datetimeindex(self):
         data = pd.DataFrame(dict(power=range(10)), index=range(10))
 
@@ -94,3 +139,70 @@ class TestSweatSeriesAccessor:
             [0, 100, 150, np.inf], ["zone 1", "zone 2", "zone 3"]
         )
         assert set(time_in_zone.index.unique()) == set(["zone 1", "zone 2", "zone 3"])
+
+    def test_accessor_time_in_zone_empty_zone(self):
+        example = sweat.examples(path="4078723797.fit")
+        data = sweat.read_fit(example.path)
+
+        time_in_zone = data["heartrate"].sweat.time_in_zone(
+            [0, 100, 150, 250, np.inf], ["zone 1", "zone 2", "zone 3", "zone 4"]
+        )
+        assert list(time_in_zone.index) == ["zone 1", "zone 2", "zone 3", "zone 4"]
+        assert time_in_zone["zone 4"] == pd.Timedelta(0)
+        assert time_in_zone.sum() == pd.Timedelta(
+            ((data["heartrate"] > 0) & (data["heartrate"] <= 250)).sum(), unit="s"
+        )
+
+
+@pytest.mark.parametrize(
+    "index,expected",
+    [
+        (pd.date_range("2021-01-01", periods=10, freq="s"), True),
+        (
+            pd.DatetimeIndex(pd.date_range("2021-01-01", periods=10, freq="s").values),
+            True,
+        ),
+        (pd.timedelta_range(0, periods=10, freq="s"), True),
+        (pd.date_range("2021-01-01", periods=10, freq="2s"), False),
+        (
+            pd.DatetimeIndex(["2021-01-01 00:00:00", "2021-01-01 00:00:01", pd.NaT]),
+            False,
+        ),
+        (pd.DatetimeIndex(["2021-01-01 00:00:00", "2021-01-01 00:00:02"]), False),
+        (pd.RangeIndex(10), False),
+    ],
+)
+def test_is_sampled_at(index, expected):
+    assert sweat.pandas._is_sampled_at(index, np.timedelta64(1, "s")) is expected
+
+
+def test_validate_sample_rate_cache(monkeypatch):
+    index = pd.DatetimeIndex(pd.date_range("2021-01-01", periods=10, freq="s").values)
+    data = pd.Series(range(10), index=index, name="power")
+    data.sweat.mean_max()
+
+    calls = []
+    is_sampled_at = sweat.pandas._is_sampled_at
+    monkeypatch.setattr(
+        sweat.pandas,
+        "_is_sampled_at",
+        lambda *args: calls.append(args) or is_sampled_at(*args),
+    )
+    data.sweat.mean_max()
+    assert calls == []
+
+    key = id(index)
+    del data, index
+    gc.collect()
+    assert key not in sweat.pandas._sample_rate_cache
+
+
+def test_validate_sample_rate_message():
+    data = pd.Series(
+        range(10),
+        index=pd.date_range("2021-01-01", periods=10, freq="2s"),
+        name="power",
+    )
+
+    with pytest.raises(AttributeError, match="regular interval of 1s"):
+        data.sweat.mean_max()
@@ -125,3 +125,107 @@ def test_enable_type_casting_all(reload_power_module):
 def test_enable_type_casting_error():
     with pytest.raises(ValueError):
         utils.enable_type_casting("covfefe")
+
+
+@pytest.mark.parametrize("a", [0.9, np.linspace(0.5, 1.0, 100)])
+def test_linear_recurrence(a):
+    b = np.random.default_rng(42).normal(size=100)
+
+    expected = []
+    previous = 2.0
+    for coefficient, value in zip(np.broadcast_to(a, b.shape), b):
+        previous = coefficient * previous + value
+        expected.append(previous)
+
+    rv = utils.linear_recurrence(a, b, initial=2.0)
+
+    assert rv == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("n", [1, 64, 1003, 5000])
+@pytest.mark.parametrize("switches", [2, 200])
+def test_linear_recurrence_long(n, switches):
+    rng = np.random.default_rng(42)
+    a = np.where(np.arange(n) % (n // switches + 1) == 0, 0.5, 0.99)
+    if switches > 2:
+        a[rng.random(n) < 0.01] = 0.0
+    b = rng.normal(size=(2, n))
+
+    expected = np.empty((2, n))
+    previous = np.asarray([1.0, -1.0])
+    for t in range(n):
+        previous = a[t] * previous + b[:, t]
+        expected[:, t] = previous
+
+    rv = utils.linear_recurrence(a, b, initial=[1.0, -1.0])
+    assert rv == pytest.approx(expected)
+
+    rv = utils.linear_recurrence(np.stack([a, a[::-1]]), b[0], initial=[1.0, -1.0])
+    assert rv[0] == pytest.approx(expected[0])
+    assert rv[1] == pytest.approx(utils.linear_recurrence(a[::-1], b[0], initial=-1.0))
+
+
+@pytest.mark.parametrize("low,high", [(-1.0, 1.0), (0.999, 1.001), (1e-3, 2e-3)])
+def test_linear_recurrence_varying(low, high):
+    rng = np.random.default_rng(42)
+    a = rng.uniform(low, high, size=(3, 3000))
+    b = rng.normal(size=(3, 3000))
+
+    expected = np.empty((3, 3000))
+    previous = np.asarray([1.0, 0.0, -1.0])
+    for t in range(3000):
+        previous = a[:, t] * previous + b[:, t]
+        expected[:, t] = previous
+
+    rv = utils.linear_recurrence(a, b, initial=[1.0, 0.0, -1.0])
+
+    assert rv == pytest.approx(expected)
+
+
+def test_linear_recurrence_broadcasting():
+    a = np.asarray([[0.5], [0.9]]) * np.ones((2, 10))
+    b = np.ones(10)
+
+    rv = utils.linear_recurrence(a, b, initial=[0.0, 1.0])
+
+    assert rv.shape == (2, 10)
+    assert rv[0] == pytest.approx(utils.linear_recurrence(0.5, b))
+    assert rv[1] == pytest.approx(utils.linear_recurrence(0.9, b, initial=1.0))
+
+
+def _square_root(item):
+    if item < 0:
+        raise ValueError("negative")
+
+    return dict(root=np.sqrt(item))
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_apply_many(n_jobs):
+    rv = utils.apply_many(
+        _square_root,
+        {"a": 4.0, "b": -1.0, "c": 9.0},
+        index="key",
+        columns=["root"],
+        n_jobs=n_jobs,
+        chunk_size=1,
+    )
+
+    assert list(rv.index) == ["a", "b", "c"]
+    assert list(rv.columns) == ["root", "error"]
+    assert rv.loc["c", "root"] == 3.0
+    assert np.isnan(rv.loc["b", "root"])
+    assert rv.loc["b", "error"] == "ValueError: negative"
+    assert rv["error"].isna().sum() == 2
+
+
+def test_apply_many_multi_index():
+    rv = utils.apply_many(
+        _square_root,
+        {("a", 1): 4.0, ("a", 2): 16.0},
+        index=["x", "y"],
+        columns=["root"],
+    )
+
+    assert list(rv.index) == [("a", 1), ("a", 2)]
+    assert rv["root"].tolist() == [2.0, 4.0]